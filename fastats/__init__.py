@@ -1,20 +1,54 @@
 
-from fastats.core.decorator import fs
-from fastats.core.single_pass import single_pass
-from fastats.core.windowed_pass import windowed_pass, windowed_pass_2d
-from fastats.core.windowed_stateful_pass import windowed_stateful_pass
-from fastats.optimise.newton_raphson import newton_raphson
+from fastats.utilities.lazy import lazy_package
 from ._version import VERSION
 
 
 __all__ = [
     'fs',
     'single_pass',
+    'single_pass_parallel',
     'windowed_pass',
     'windowed_pass_2d',
     'windowed_stateful_pass',
+    'windowed_stateful_pass_parallel',
+    'rolling_min',
+    'rolling_max',
+    'rolling_argmin',
+    'rolling_argmax',
+    'rolling_median',
+    'rolling_quantile',
+    'rolling_moments',
+    'broadcast_pass',
+    'pipeline',
     'newton_raphson',
+    'precompile',
+    'warmup',
 ]
 
 
+# These are imported on first access, as importing
+# numba makes `import fastats` slow otherwise.
+lazy_package(__name__, {
+    'fs': 'fastats.core.decorator',
+    'single_pass': 'fastats.core.single_pass',
+    'single_pass_parallel': 'fastats.core.single_pass',
+    'windowed_pass': 'fastats.core.windowed_pass',
+    'windowed_pass_2d': 'fastats.core.windowed_pass',
+    'windowed_stateful_pass': 'fastats.core.windowed_stateful_pass',
+    'windowed_stateful_pass_parallel': 'fastats.core.windowed_stateful_pass',
+    'rolling_min': 'fastats.core.rolling',
+    'rolling_max': 'fastats.core.rolling',
+    'rolling_argmin': 'fastats.core.rolling',
+    'rolling_argmax': 'fastats.core.rolling',
+    'rolling_median': 'fastats.core.rolling',
+    'rolling_quantile': 'fastats.core.rolling',
+    'rolling_moments': 'fastats.core.rolling',
+    'broadcast_pass': 'fastats.core.broadcast_pass',
+    'pipeline': 'fastats.core.pipeline',
+    'newton_raphson': 'fastats.optimise.newton_raphson',
+    'precompile': 'fastats.core.precompile',
+    'warmup': 'fastats.core.precompile',
+})
+
+
 __version__ = VERSION
@@ -2,7 +2,7 @@
 from inspect import isbuiltin, isfunction
 from types import MappingProxyType
 
-from numba import jit
+from numba import guvectorize, jit, vectorize
 from numba.core.target_extension import CPUDispatcher
 
 
@@ -10,19 +10,82 @@ JIT_KWARGS = MappingProxyType({
     'nopython': True, 'nogil': True
 })
 
+# Options which only apply to the function they're
+# given for, and not to the functions it calls.
+TOP_LEVEL_OPTIONS = frozenset(('parallel',))
 
-def convert_to_jit(func):
+_default_options = {}
+
+
+def set_default_jit_options(**options):
+    """
+    Sets numba options (such as `fastmath=True`) used
+    for every `@fs` specialisation built from now on.
+
+    These take precedence over `JIT_KWARGS`, but not
+    over the options given to `@fs` or passed with
+    `jit_options=` when calling an `@fs` function.
+    Calling this without options resets the defaults.
+    """
+    global _default_options
+    _default_options = dict(options)
+
+
+def get_default_jit_options():
+    return dict(_default_options)
+
+
+def callee_options(options):
+    """
+    The subset of `options` which apply to the
+    functions called by (or substituted into) a
+    function compiled with `options`.
+
+    >>> callee_options({'parallel': True, 'fastmath': True})
+    {'fastmath': True}
+    """
+    return {k: v for k, v in options.items() if k not in TOP_LEVEL_OPTIONS}
+
+
+def convert_to_jit(func, **options):
     if isinstance(func, CPUDispatcher) or isbuiltin(func):
         return func
 
     if not isfunction(func):
         raise TypeError("Can't JIT a non-function object: {}".format(func))
 
-    _jit = jit(**JIT_KWARGS)
+    _jit = jit(**dict(JIT_KWARGS, **options))
 
     return _jit(func)
 
 
+def convert_to_ufunc(func, signatures=(), layout=None, parallel=False, **options):
+    """
+    Compiles `func` to a numba ufunc, or to a generalized
+    ufunc if a `layout` such as `'(n)->()'` is given.
+
+    Without `signatures` a ufunc is compiled for each new
+    combination of input types, and a generalized ufunc
+    must be passed its output array(s). `parallel=True`
+    uses numba's parallel ufunc target, which needs
+    `signatures`.
+    """
+    if isinstance(func, CPUDispatcher):
+        func = func.py_func
+
+    if not isfunction(func):
+        raise TypeError("Can't create a ufunc from a non-function object: {}".format(func))
+
+    if parallel:
+        options['target'] = 'parallel'
+
+    if layout is None:
+        return vectorize(list(signatures), **options)(func)
+    if not signatures:
+        return guvectorize(layout, **options)(func)
+    return guvectorize(list(signatures), layout, **options)(func)
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
@@ -19,11 +19,26 @@ def copy_func(f, new_funcs):
     True
     >>> copy_func(np.sin, {})
     <ufunc 'sin'>
+
+    The values of any variables captured by a closure
+    are copied into the globals of the copy, so that
+    code recompiled from the function's source (which
+    has no free variables) sees the same values:
+
+    >>> def make_adder(n):
+    ...     def add(x):
+    ...         return x + n
+    ...     return add
+    >>> copy_func(make_adder(3), {}).__globals__['n']
+    3
     """
     if not hasattr(f, '__globals__'):
         return f
     globs = copy(f.__globals__)
     globs.update(new_funcs)
+    if f.__closure__:
+        for name, cell in zip(f.__code__.co_freevars, f.__closure__):
+            globs[name] = cell.cell_contents
     g = types.FunctionType(
         f.__code__, globs, name=f.__name__,
         argdefs=f.__defaults__, closure=f.__closure__)
@@ -32,6 +47,23 @@ def copy_func(f, new_funcs):
     return g
 
 
+def replace_code(f, code):
+    """
+    Sets the code of `f` to `code`, returning a new
+    function if `f` is a closure, as a code object
+    can't replace one with different free variables.
+    """
+    if not f.__closure__:
+        f.__code__ = code
+        return f
+
+    g = types.FunctionType(code, f.__globals__, name=f.__name__, argdefs=f.__defaults__)
+    g = functools.update_wrapper(g, f)
+    del g.__wrapped__
+    g.__kwdefaults__ = f.__kwdefaults__
+    return g
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
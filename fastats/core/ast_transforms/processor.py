@@ -7,52 +7,117 @@ from types import CodeType
 
 from numba import jit
 
-from fastats.core.ast_transforms.convert_to_jit import convert_to_jit
-from fastats.core.ast_transforms.copy_func import copy_func
+from fastats.core.ast_transforms.convert_to_jit import callee_options, convert_to_jit
+from fastats.core.ast_transforms.copy_func import copy_func, replace_code
 from fastats.core.ast_transforms.transformer import CallTransform
+from fastats.core import disk_cache
+from fastats.core.instrumentation import timed, track
 
 
 class AstProcessor:
-    def __init__(self, top_level_func, overrides, replaced, new_funcs=None):
+    """
+    Rewrites `top_level_func` (and, recursively, every function
+    it calls) with the `overrides` substituted in.
+
+    Each processor works on a copy of the function whose globals
+    are a private copy of the defining module's namespace, so the
+    module itself is never modified and separate specialisations
+    can be built concurrently from multiple threads.
+
+    `jit_options` are passed to numba for this function, and
+    (apart from `TOP_LEVEL_OPTIONS`) for the functions it
+    calls. The compiled function is persisted to `cache_dir`
+    if given, otherwise to the directory configured in
+    `fastats.core.disk_cache` (if any).
+    """
+    def __init__(self, top_level_func, overrides, new_funcs=None,
+                 jit_options=None, cache_dir=None):
         self.top_level_func = copy_func(top_level_func, new_funcs or {})
         self._new_funcs = new_funcs or {}
         self._sig = signature(self.top_level_func)
         self._overrides = overrides
-        self._replaced = replaced
+        self._jit_options = dict(jit_options or {})
+        if cache_dir is None:
+            cache_dir = disk_cache.get_cache_dir()
+        self._cache_dir = cache_dir
         self._debug = self._overrides.get('debug')
 
     def process(self):
-        source = inspect.getsource(self.top_level_func)
+        name = self.top_level_func.__qualname__
+        with timed('getsource', name):
+            source = inspect.getsource(self.top_level_func)
 
         # `ast.parse` can throw an IndentationError if passed
         # standalone nested function. In this case we take the
         # more expensive code path through `uncompile`.
-        try:
-            tree = ast.parse(source)
-        except IndentationError:
-            data = uncompile(self.top_level_func.__code__)
-            tree = parse_snippet(*data)
+        with timed('parse', name):
+            try:
+                tree = ast.parse(source)
+            except IndentationError:
+                data = uncompile(self.top_level_func.__code__)
+                tree = parse_snippet(*data)
 
         # We have to dynamically add the jit to nested functions
         # in order to get `nopython` mode working correctly. As
         # a result we always need `jit` in globals.
         # This can be removed if/when numba supports nested functions
         # in nopython mode by default.
-        globs = self.top_level_func.__globals__
-        globs['jit'] = jit
-        t = CallTransform(self._overrides, globs, self._replaced, self._new_funcs)
-        new_tree = t.visit(tree)
+        namespace = self.top_level_func.__globals__
+        global_values = disk_cache.globals_fingerprint(self.top_level_func)
+        namespace['jit'] = jit
+
+        # Decorators (such as `@fs(parallel=True)`) mustn't be
+        # transformed as calls within the function.
+        tree.body[0].decorator_list = [ast.Name(id='jit', ctx=ast.Load())]
+        t = CallTransform(
+            self._overrides, namespace, self._new_funcs,
+            func_name=self.top_level_func.__name__,
+            jit_options=callee_options(self._jit_options)
+        )
+        with timed('transform', name):
+            new_tree = t.visit(tree)
 
-        # TODO remove the fs decorator from within the ast code
-        new_tree.body[0].decorator_list = [ast.Name(id='jit', ctx=ast.Load())]
         ast.fix_missing_locations(new_tree)
         if self._debug:
             pprint(ast.dump(new_tree))
 
-        code_obj = recompile(new_tree, '<fastats>', 'exec')
-
-        self.top_level_func.__code__ = code_obj
-        return convert_to_jit(self.top_level_func)
+        # The fingerprint covers the source of this function and
+        # every function substituted into it, so it changes if any
+        # of them change. If an on-disk cache is configured the
+        # rewritten code is compiled against a real file named by
+        # the fingerprint, which lets numba persist the result.
+        # numba doesn't include the JIT options in its own cache
+        # key, so they're part of the fingerprint.
+        # Likewise the values captured by a closure and the module
+        # globals read by the function (including functions numba
+        # already supports, which aren't rewritten), as numba
+        # freezes them into the compiled code.
+        options = dict(self._jit_options)
+        key = disk_cache.combine(source, t.dependencies + [
+            repr(sorted(options.items())), disk_cache.closure_fingerprint(self.top_level_func),
+            global_values
+        ])
+        filename = '<fastats>'
+        if self._cache_dir is not None:
+            try:
+                filename = disk_cache.source_path(
+                    new_tree.body[0].name, key, new_tree, self._cache_dir
+                )
+                options['cache'] = True
+            except OSError:
+                # An unusable cache directory only costs the caching.
+                pass
+
+        with timed('recompile', name):
+            code_obj = recompile(new_tree, filename, 'exec')
+
+        self.top_level_func = replace_code(self.top_level_func, code_obj)
+        self.top_level_func._fastats_fingerprint = key
+        compiled = track(convert_to_jit(self.top_level_func, **options))
+
+        # Recursive calls resolve to the compiled function.
+        namespace[self.top_level_func.__name__] = compiled
+        return compiled
 
 
 def recompile(source, filename, mode, flags=0):
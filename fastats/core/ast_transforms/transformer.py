@@ -3,8 +3,44 @@ import ast
 from inspect import isbuiltin
 
 import numpy as np
+from numba.core.registry import cpu_target
 
 from fastats.core.ast_transforms.convert_to_jit import convert_to_jit
+from fastats.core.disk_cache import fingerprint
+
+
+_typing_context_loaded = False
+
+
+def numba_supported(func):
+    """
+    Returns True if numba can already type `func` when it's
+    used as a global, for example numpy functions imported
+    without the module prefix, or functions which have already
+    been compiled. These must not be rewritten.
+
+    >>> from numpy import empty_like
+    >>> numba_supported(empty_like)
+    True
+    >>> def f(x):
+    ...     return x
+    >>> numba_supported(f)
+    False
+    """
+    global _typing_context_loaded
+    typing_context = cpu_target.typing_context
+    if not _typing_context_loaded:
+        # The numpy function registrations are only installed
+        # once the target context has been refreshed.
+        cpu_target.target_context.refresh()
+        typing_context.refresh()
+        _typing_context_loaded = True
+
+    try:
+        typing_context.resolve_value_type(func)
+    except ValueError:
+        return False
+    return True
 
 
 class CallTransform(ast.NodeTransformer):
@@ -17,23 +53,32 @@ class CallTransform(ast.NodeTransformer):
 
     Warning
     -------
-    `func_globals` and `replaced` are both **mutated**, not copied,
-    by this class.
+    `namespace` is **mutated**, not copied, by this class.
 
-    `func_globals` is required as it's the `__globals__` dict on
-    each function object. Unfortunately this dict can't be replaced
-    (it is supposedly read-only), but given that it's a normal dict,
-    it can be modified.
+    `namespace` is the `__globals__` dict of the function object
+    being rewritten. The replacement functions are inserted into it
+    under their own names, so it must be private to this rewrite -
+    `AstProcessor` guarantees this by processing a copy of each
+    function with a copy of its module's globals, which means the
+    original module is never modified.
 
-    Therefore during the `code_transform` context manager, we modify
-    the globals dict with the ast-transformed function objects, then
-    replace the original function objects in the context `exit` code.
+    The fingerprints of every function substituted or processed
+    are collected in `dependencies`, along with the names of the
+    calls they replace, so that the caller can tell when the
+    compiled result of this tree is stale.
+
+    `func_name` is the name of the function being rewritten;
+    recursive calls to it are left for `AstProcessor` to resolve.
+    `jit_options` are used for the substituted and called functions.
     """
-    def __init__(self, change_params: dict, func_globals: dict, replaced: dict, new_funcs: dict):
+    def __init__(self, change_params: dict, namespace: dict, new_funcs: dict,
+                 func_name=None, jit_options=None):
         self._params = change_params
-        self._globals = func_globals
-        self._replaced = replaced
+        self._globals = namespace
         self._new_funcs = new_funcs
+        self._func_name = func_name
+        self._jit_options = jit_options or {}
+        self.dependencies = []
 
     def visit_Call(self, node):
         node = self.generic_visit(node)
@@ -59,9 +104,9 @@ class CallTransform(ast.NodeTransformer):
         elif name in self._params:
             new_name = self.new_name_from_call_name(name)
             new_func = self._params[name]
-            self._replaced[name] = self._globals[name]
             self._globals[name] = convert_to_jit(self._globals[name])
-            self._globals[new_name] = convert_to_jit(new_func)
+            self._globals[new_name] = convert_to_jit(new_func, **self._jit_options)
+            self.dependencies.append('{}={}'.format(name, fingerprint(new_func)))
 
             new_node = ast.Call(
                 func=ast.Name(id=new_name, ctx=ast.Load()),
@@ -70,6 +115,9 @@ class CallTransform(ast.NodeTransformer):
             ast.copy_location(new_node, node)
             ast.fix_missing_locations(new_node)
             return new_node
+        elif name == self._func_name:
+            # A recursive call; processing it again would never end.
+            return node
         else:
             # Lazy import because it's circular.
             from fastats.core.ast_transforms.processor import AstProcessor
@@ -77,14 +125,18 @@ class CallTransform(ast.NodeTransformer):
 
             not_ufunc = not isinstance(orig_inner_func, np.ufunc)
             not_builtin = not isbuiltin(orig_inner_func)
-            if not_ufunc and not_builtin:
-                self._replaced[node.func.id] = orig_inner_func
+            if not_ufunc and not_builtin and not numba_supported(orig_inner_func):
                 proc = AstProcessor(
-                    orig_inner_func, self._params,
-                    self._replaced, self._new_funcs
+                    orig_inner_func, self._params, self._new_funcs,
+                    jit_options=self._jit_options
                 )
                 new_inner_func = proc.process()
                 self._globals[node.func.id] = convert_to_jit(new_inner_func)
+                self.dependencies.append('{}={}'.format(name, fingerprint(new_inner_func)))
+            elif not_ufunc and not_builtin:
+                # Already compiled (or otherwise supported by numba),
+                # so it's left alone but its code still matters.
+                self.dependencies.append('{}={}'.format(name, fingerprint(orig_inner_func)))
 
         ast.fix_missing_locations(node)
         return node
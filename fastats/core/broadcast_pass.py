@@ -0,0 +1,52 @@
+
+from fastats.core.decorator import fs
+from fastats.core.output import result_array
+
+
+def value(x):
+    return x
+
+
+@fs
+def broadcast_pass(x, out=None, dtype=None):
+    """
+    Applies the scalar function `value` to every
+    element of `x`, whatever its shape.
+
+    Elements are visited in C order; the iteration
+    is a single flat loop when `x` is C-contiguous,
+    and only falls back to indexing through the
+    strides when it isn't. `out` and `dtype` are
+    the same as for `single_pass`.
+
+    Tests
+    -----
+    >>> def my_demo(a):
+    ...     return a * a + 1
+    >>> data = np.arange(12.0).reshape(2, 3, 2)
+    >>> broadcast_pass(data, value=my_demo)[1]
+    array([[ 37.,  50.],
+           [ 65.,  82.],
+           [101., 122.]])
+
+    Non-contiguous views work too:
+
+    >>> broadcast_pass(data[:, ::2], value=my_demo)
+    array([[[  1.,   2.],
+            [ 17.,  26.]],
+    <BLANKLINE>
+           [[ 37.,  50.],
+            [101., 122.]]])
+    """
+    result = result_array(x, out, dtype)
+    flat_result = result.flat
+    i = 0
+    for item in x.flat:
+        flat_result[i] = value(item)
+        i += 1
+    return result
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,162 @@
+from collections import OrderedDict, namedtuple
+from inspect import isfunction
+from threading import RLock
+
+from fastats.core.disk_cache import global_names
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+MAX_SPECIALISATIONS = 256
+
+
+def _hashable(value):
+    """
+    Returns `value` if it can be used in a dict
+    key, otherwise falls back to its identity.
+
+    >>> _hashable(3)
+    3
+    >>> _hashable([1, 2])[0]
+    'id'
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return 'id', id(value)
+    return value
+
+
+def override_key(value):
+    """
+    Builds the part of a specialisation cache key
+    for a single keyword override.
+
+    Plain python functions are keyed on their code
+    object (plus defaults and closure contents)
+    rather than their identity, so that a nested
+    function which is re-created on every call of
+    its parent still hits the cache. The namespace
+    they're defined in and the values of the globals
+    they read are part of the key too, as numba
+    freezes those into the compiled code.
+
+    >>> def make():
+    ...     def square(x):
+    ...         return x * x
+    ...     return square
+    >>> make() is make()
+    False
+    >>> override_key(make()) == override_key(make())
+    True
+    >>> def scale(x):
+    ...     return x * K
+    >>> K = 2.0
+    >>> before = override_key(scale)
+    >>> K = 10.0
+    >>> override_key(scale) == before
+    False
+    """
+    if not isfunction(value):
+        return _hashable(value)
+
+    defaults = tuple(_hashable(d) for d in value.__defaults__ or ())
+    closure = tuple(
+        _hashable(cell.cell_contents) for cell in value.__closure__ or ()
+    )
+    namespace = value.__globals__
+    global_values = tuple(
+        (name, _hashable(namespace[name]))
+        for name in sorted(global_names(value.__code__)) if name in namespace
+    )
+    return (
+        value.__module__, value.__qualname__, value.__code__,
+        defaults, closure, id(namespace), global_values
+    )
+
+
+def specialisation_key(func, overrides, jit_options=None):
+    """
+    The cache key for `func` specialised with the
+    `overrides` dict of keyword replacements.
+    """
+    items = tuple(sorted(
+        (name, override_key(value)) for name, value in overrides.items()
+    ))
+    options = tuple(sorted(
+        (name, _option_key(value)) for name, value in (jit_options or {}).items()
+    ))
+    return func, items, options
+
+
+def _option_key(value):
+    """
+    JIT options such as ufunc `signatures` may be
+    lists, which are keyed on their contents.
+
+    >>> _option_key(['float64(float64)'])
+    ('float64(float64)',)
+    """
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return _hashable(value)
+
+
+class SpecialisationCache:
+    """
+    A thread-safe LRU mapping of specialisation key
+    to the compiled function produced by `@fs`.
+
+    >>> cache = SpecialisationCache(maxsize=2)
+    >>> cache.get('a') is None
+    True
+    >>> cache.put('a', 1)
+    >>> cache.put('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.put('c', 3)  # evicts 'b', the least recently used
+    >>> cache.get('b') is None
+    True
+    >>> cache.info()
+    CacheInfo(hits=1, misses=2, maxsize=2, currsize=2)
+    """
+    def __init__(self, maxsize=MAX_SPECIALISATIONS):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = RLock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.maxsize, len(self._data))
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
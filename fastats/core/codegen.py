@@ -0,0 +1,32 @@
+import hashlib
+import linecache
+
+
+def define(source, name, namespace):
+    """
+    Executes the generated `source` in `namespace`
+    and returns the function `name` it defines.
+
+    The source is registered with `linecache`
+    under a name derived from its hash, so the
+    AST transform can read it back in the same
+    way as for functions defined in files.
+
+    >>> import inspect
+    >>> f = define('def f(x):\\n    return x + 1\\n', 'f', {})
+    >>> f(1)
+    2
+    >>> inspect.getsource(f)
+    'def f(x):\\n    return x + 1\\n'
+    """
+    digest = hashlib.sha256(source.encode()).hexdigest()[:16]
+    filename = '<fastats-{}-{}>'.format(name, digest)
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+    exec(compile(source, filename, 'exec'), namespace)
+    return namespace[name]
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -1,12 +1,88 @@
 
+import pickle
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from inspect import isfunction
+from inspect import isfunction, signature
+from threading import Lock
 
-from fastats.core.ast_transforms.convert_to_jit import convert_to_jit
+from numba import get_num_threads, set_num_threads
+from numba.core.registry import CPUDispatcher
+
+from fastats.core.ast_transforms.convert_to_jit import (
+    callee_options, convert_to_jit, convert_to_ufunc, get_default_jit_options, set_default_jit_options
+)
 from fastats.core.ast_transforms.processor import AstProcessor
+from fastats.core.cache import SpecialisationCache, specialisation_key
+from fastats.core.instrumentation import emit
+
+
+_SPECIALISATIONS = SpecialisationCache()
+
+COMPILE_WORKERS = 4
+
+# Keyword arguments passed through to calls of ufuncs.
+UFUNC_KWARGS = frozenset((
+    'out', 'where', 'axes', 'axis', 'keepdims',
+    'casting', 'order', 'dtype', 'subok', 'signature',
+))
+
+# Decorator options which only apply to ufuncs.
+_UFUNC_OPTIONS = ('signatures', 'layout', 'parallel', 'identity')
+
+_compile_executor = None
+_compile_executor_lock = Lock()
 
 
-def fs(func):
+def compile_executor():
+    """
+    The thread pool used by `compile_async`, created on
+    first use.
+    """
+    global _compile_executor
+    with _compile_executor_lock:
+        if _compile_executor is None:
+            _compile_executor = ThreadPoolExecutor(
+                max_workers=COMPILE_WORKERS,
+                thread_name_prefix='fastats-compile'
+            )
+    return _compile_executor
+
+
+class Specialisation(CPUDispatcher):
+    """
+    The compiled function for an `@fs` specialisation.
+
+    These are pickled by recipe - a reference to the decorated
+    function, the overrides and the JIT options - rather than by
+    value, so unpickling one (for example in a worker process)
+    builds the specialisation through that process' own caches,
+    including the on-disk cache if one is configured.
+
+    If part of the recipe can't be pickled by reference (such as
+    a closure passed as an override) this falls back to numba's
+    pickling of the compiled function by value.
+    """
+    def __reduce__(self):
+        try:
+            pickle.dumps(self.fastats_recipe)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return super().__reduce__()
+        return _rebuild, self.fastats_recipe
+
+
+def _rebuild(func, decorator_options, overrides, jit_options):
+    if not hasattr(func, 'specialise'):
+        func = fs(func, **decorator_options)
+    return func.specialise(jit_options=jit_options, **overrides)
+
+
+def _importable(func):
+    module = sys.modules.get(func.__module__)
+    return getattr(module, func.__qualname__, None) is func
+
+
+def fs(func=None, **jit_options):
     """
     This is the decorator which performs recursive AST substitution of
     functions, and optional JIT-compilation using `numba`_.
@@ -71,14 +147,113 @@ def fs(func):
     >>> # At this point the new function has **not** been called.
     >>> new_func(6)
     108.0
+
+    Each specialisation is cached (per decorated function,
+    keyword overrides and JIT options), so repeated calls with
+    the same keyword arguments skip the AST transform and
+    re-compilation:
+
+    >>> my_func(6, calculate=cube, return_callable=True) is new_func
+    True
+
+    The cache is bounded (least-recently-used entries are
+    evicted) and can be inspected or reset using
+    `fs.cache_info()` and `fs.cache_clear()`.
+
+    Specialisations can also be built without blocking the
+    caller using `compile_async`, which returns a
+    `concurrent.futures.Future` resolving to the compiled
+    function. Any numba signatures passed are compiled eagerly
+    on the background thread as well:
+
+    >>> future = my_func.compile_async(
+    ...     calculate=cube, signatures=['float64(float64)'])
+    >>> future.result() is new_func
+    True
+    >>> len(new_func.signatures)  # int64 from the call above, plus float64
+    2
+
+    Until the future is done callers can either block on
+    `future.result()` or carry on with a fallback. Note that
+    numba holds a global lock while compiling, so concurrent
+    requests are compiled one at a time in the background.
+
+    Keyword arguments to the decorator itself are passed to
+    numba when compiling the decorated function, for example
+    `@fs(parallel=True)` for functions using `numba.prange`.
+    The number of threads used by such a function can be
+    limited per call with the `num_threads` keyword:
+
+    >>> from numba import prange
+    >>> @fs(parallel=True)
+    ... def total(x):
+    ...     result = 0.0
+    ...     for i in prange(x.shape[0]):
+    ...         result += calculate(x[i])
+    ...     return result
+    >>> total(np.arange(4.0), calculate=cube, num_threads=1)
+    36.0
+
+    With `target='ufunc'` each specialisation is compiled to a
+    numba ufunc instead (see `numba.vectorize`), which gives
+    broadcasting, `out=`, `reduce`/`accumulate` and so on:
+
+    >>> @fs(target='ufunc')
+    ... def combine(a, b):
+    ...     return calculate(a) + b
+    >>> combine(np.arange(3.0), np.ones((2, 1)), calculate=cube)
+    array([[1., 2., 9.],
+           [1., 2., 9.]])
+    >>> ufunc = combine(calculate=cube, return_callable=True)
+    >>> ufunc.nin, ufunc.nout
+    (2, 1)
+
+    Passing a gufunc `layout` such as `'(n)->()'` compiles a
+    generalized ufunc (see `numba.guvectorize`). `signatures`
+    (and `identity`) are passed to numba, and `parallel=True`
+    selects numba's parallel ufunc target.
+
+    numba normally compiles each substituted function separately
+    and leaves it to LLVM to inline the calls. Passing
+    `inline=True` inlines substituted functions (and the
+    functions they call) into the caller when numba builds its
+    intermediate representation instead, so the loop calling
+    them is optimised (and vectorised) as a whole:
+
+    >>> my_func(6, calculate=cube, inline=True)
+    108.0
+
+    Specialisations can be pickled, so they can be sent to
+    worker processes (see `Specialisation`):
+
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(new_func))(6)
+    108.0
+
+    Other numba options can be passed for a single call
+    with `jit_options`, and are part of the cache key:
+
+    >>> my_func(6.0, calculate=cube, jit_options={'fastmath': True})
+    108.0
+
+    Options are taken from (in increasing precedence)
+    `JIT_KWARGS`, the defaults set with
+    `fs.set_default_jit_options()`, the decorator and
+    the call.
+    Options other than `parallel` also apply to the
+    substituted functions.
     """
-    _func = func
-    replaced = {}
+    if func is None:
+        return lambda f: fs(f, **jit_options)
 
-    @wraps(func)
-    def fs_wrapper(*args, **kwargs):
-        return_callable = kwargs.pop('return_callable', None)
+    _func = func
+    _options = jit_options
+    _params = frozenset(signature(_func).parameters)
+    _ufunc = jit_options.get('target') == 'ufunc' or 'layout' in jit_options
+    if _ufunc:
+        _params |= UFUNC_KWARGS
 
+    def specialise(inline=False, jit_options=None, **kwargs):
         # This deliberately mutates the kwargs.
         # We don't want to have a fs-decorated function
         # as a kwarg to another, so we undecorate it first.
@@ -86,17 +261,81 @@ def fs(func):
             if hasattr(v, 'undecorated'):
                 kwargs[k] = v.undecorated
 
+        options = get_default_jit_options()
+        options.update(_options)
+        options.update(jit_options or {})
+        if inline:
+            options['inline'] = 'always'
+
+        key = specialisation_key(_func, kwargs, options)
+        specialised = _SPECIALISATIONS.get(key)
+        if specialised is None:
+            emit(_func.__qualname__, 'cache_miss')
+            overrides = dict(kwargs)
+            specialised = _specialise(kwargs, options)
+            if isinstance(specialised, CPUDispatcher):
+                # Decorated functions are pickled by reference where
+                # possible, otherwise they're rebuilt with `fs`.
+                owner = fs_wrapper if _importable(fs_wrapper) else _func
+                specialised.__class__ = Specialisation
+                specialised.fastats_recipe = (owner, _options, overrides, options)
+            _SPECIALISATIONS.put(key, specialised)
+        else:
+            emit(_func.__qualname__, 'cache_hit')
+        return specialised
+
+    def compile_async(signatures=(), **kwargs):
+        def build():
+            specialised = specialise(**kwargs)
+            for sig in signatures:
+                specialised.compile(sig)
+            return specialised
+
+        return compile_executor().submit(build)
+
+    @wraps(func)
+    def fs_wrapper(*args, **kwargs):
+        return_callable = kwargs.pop('return_callable', None)
+        num_threads = kwargs.pop('num_threads', None)
+        inline = kwargs.pop('inline', False)
+        call_options = kwargs.pop('jit_options', None)
+
+        # Keyword arguments naming parameters of the decorated
+        # function (such as `out=`) are arguments, not overrides.
+        call_kwargs = {k: kwargs.pop(k) for k in _params.intersection(kwargs)}
+
         # TODO : ensure jit function returned
-        if not kwargs:
-            return _func(*args)
+        if not kwargs and num_threads is None and call_options is None and not _ufunc:
+            return _func(*args, **call_kwargs)
+
+        specialised = specialise(inline=inline, jit_options=call_options, **kwargs)
+        if return_callable:
+            return specialised
 
+        if num_threads is None:
+            return specialised(*args, **call_kwargs)
+
+        # numba's thread count is thread-local, so this
+        # doesn't affect calls made from other threads.
+        previous = get_num_threads()
+        set_num_threads(num_threads)
+        try:
+            return specialised(*args, **call_kwargs)
+        finally:
+            set_num_threads(previous)
+
+    def _specialise(kwargs, options):
         # TODO : remove fastats keywords such as 'debug'
         # before passing into AstProcessor
+        ufunc_options = {}
+        if _ufunc:
+            options = {k: v for k, v in options.items() if k != 'target'}
+            ufunc_options = {k: options.pop(k) for k in _UFUNC_OPTIONS if k in options}
+
         new_funcs = {}
         for v in kwargs.values():
             if isfunction(v) and v.__name__ not in kwargs:
-                inner_replaced = {}
-                processor = AstProcessor(v, kwargs, inner_replaced, new_funcs)
+                processor = AstProcessor(v, kwargs, new_funcs, jit_options=callee_options(options))
                 proc = processor.process()
                 new_funcs[v.__name__] = convert_to_jit(proc)
 
@@ -106,17 +345,26 @@ def fs(func):
                 new_kwargs[k] = new_funcs[v.__name__]
         kwargs.update(new_kwargs)
 
-        processor = AstProcessor(_func, kwargs, replaced, new_funcs)
+        processor = AstProcessor(_func, kwargs, new_funcs, jit_options=options)
         proc = processor.process()
-        if return_callable:
+        if not _ufunc:
             return convert_to_jit(proc)
 
-        return convert_to_jit(proc)(*args)
+        options.pop('inline', None)
+        return convert_to_ufunc(proc, **ufunc_options, **options)
 
     fs_wrapper.undecorated = _func
+    fs_wrapper.specialise = specialise
+    fs_wrapper.compile_async = compile_async
     return fs_wrapper
 
 
+fs.cache_info = _SPECIALISATIONS.info
+fs.cache_clear = _SPECIALISATIONS.clear
+fs.set_default_jit_options = set_default_jit_options
+fs.get_default_jit_options = get_default_jit_options
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
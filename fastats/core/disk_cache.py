@@ -0,0 +1,247 @@
+import ast
+import hashlib
+import inspect
+import os
+import sys
+from inspect import isfunction
+from types import CodeType, ModuleType
+
+import numba
+import numpy as np
+from llvmlite import binding as llvm
+from numba.core.registry import CPUDispatcher
+
+
+CACHE_DIR_ENV = 'FASTATS_CACHE_DIR'
+
+_cache_dir = os.environ.get(CACHE_DIR_ENV) or None
+
+
+def set_cache_dir(path):
+    """
+    Sets the directory used to persist compiled
+    `@fs` specialisations between processes.
+
+    Passing `None` disables the on-disk cache. The
+    initial value is taken from the `FASTATS_CACHE_DIR`
+    environment variable.
+    """
+    global _cache_dir
+    _cache_dir = os.fspath(path) if path is not None else None
+
+
+def get_cache_dir():
+    return _cache_dir
+
+
+def default_cache_dir():
+    """
+    The per-user cache location, used where fastats
+    caches compiled functions without a directory
+    having been configured (such as `fastats.jit`).
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'fastats')
+
+
+def jit_cache_dir():
+    """
+    The directory `fastats.jit` (and `warmup`)
+    persist compiled functions to: the configured
+    cache directory, or `default_cache_dir()`.
+    """
+    return get_cache_dir() or default_cache_dir()
+
+
+def environment_fingerprint():
+    """
+    Everything outside of the source code which
+    determines the machine code numba generates.
+    """
+    return '|'.join((
+        sys.version,
+        numba.__version__,
+        np.__version__,
+        llvm.get_host_cpu_name(),
+        llvm.get_host_cpu_features().flatten(),
+    ))
+
+
+def fingerprint(func, _seen=None):
+    """
+    A stable hash identifying the code of `func`.
+
+    Functions which have been through the AST transform
+    carry the fingerprint computed during processing; plain
+    python functions are hashed on their source and the
+    globals they read, and anything else (builtins, ufuncs)
+    on its repr.
+
+    >>> def f(x):
+    ...     return x + 1
+    >>> fingerprint(f) == fingerprint(f)
+    True
+    >>> len(fingerprint(np.sin))
+    64
+    """
+    if isinstance(func, CPUDispatcher):
+        func = func.py_func
+
+    existing = getattr(func, '_fastats_fingerprint', None)
+    if existing is not None:
+        return existing
+
+    if isfunction(func):
+        seen = set() if _seen is None else _seen
+        if func in seen:
+            # A recursive reference, already being hashed.
+            return ''
+        seen.add(func)
+        try:
+            text = inspect.getsource(func)
+        except (OSError, TypeError):
+            text = repr((func.__code__.co_code, func.__code__.co_consts))
+        text = (
+            func.__qualname__ + text + closure_fingerprint(func, seen)
+            + globals_fingerprint(func, seen)
+        )
+    else:
+        text = repr(func)
+
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def global_names(code):
+    """
+    The names of the globals read by `code`,
+    including those read by nested functions.
+
+    >>> def f(x):
+    ...     def g(y):
+    ...         return y * K
+    ...     return g(x) + N
+    >>> sorted(global_names(f.__code__))
+    ['K', 'N']
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names.update(global_names(const))
+    return names
+
+
+def _value_text(value, seen):
+    # `@fs` functions are hashed on the function they decorate.
+    value = getattr(value, 'undecorated', value)
+    if isinstance(value, np.ndarray):
+        return value.dtype.str + repr(value.shape) + hashlib.sha256(value.tobytes()).hexdigest()
+    elif isfunction(value) or isinstance(value, CPUDispatcher):
+        return fingerprint(value, seen)
+    return repr(value)
+
+
+def closure_fingerprint(func, _seen=None):
+    """
+    A hash of the values captured by the closure
+    `func`, or an empty string for other functions.
+
+    These are frozen into the compiled code, so
+    closures with the same source but different
+    captured values must not share a cache entry.
+
+    >>> def make_adder(n):
+    ...     def add(x):
+    ...         return x + n
+    ...     return add
+    >>> closure_fingerprint(make_adder(1)) != closure_fingerprint(make_adder(2))
+    True
+    >>> closure_fingerprint(make_adder)
+    ''
+    """
+    if not func.__closure__:
+        return ''
+
+    parts = []
+    for name, cell in zip(func.__code__.co_freevars, func.__closure__):
+        parts.append('{}={}'.format(name, _value_text(cell.cell_contents, _seen)))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def globals_fingerprint(func, _seen=None):
+    """
+    A hash of the module globals read by `func`.
+
+    numba freezes global values (and the functions
+    it has already compiled) into the machine code,
+    so a change to any of them must change the key.
+    Modules are skipped, as only their attributes
+    are read, and functions are hashed on their
+    fingerprint.
+
+    >>> def scale(x):
+    ...     return x * K
+    >>> K = 2.0
+    >>> before = globals_fingerprint(scale)
+    >>> K = 10.0
+    >>> globals_fingerprint(scale) != before
+    True
+    """
+    parts = []
+    for name in sorted(global_names(func.__code__)):
+        if name not in func.__globals__:
+            continue
+        value = func.__globals__[name]
+        if isinstance(value, ModuleType):
+            continue
+        parts.append('{}={}'.format(name, _value_text(value, _seen)))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def combine(source, dependencies):
+    """
+    Combines the source of a function with the
+    fingerprints of every function it calls and
+    the environment into a single cache key.
+
+    Each dependency should name the call it
+    replaces as well, so that swapping overrides
+    between calls changes the key.
+    """
+    parts = [source, environment_fingerprint()]
+    parts.extend(sorted(dependencies))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def source_path(name, key, tree, cache_dir=None):
+    """
+    Returns the path of the file backing the
+    specialisation `name` with cache `key`,
+    writing it if it doesn't already exist.
+    `cache_dir` defaults to `get_cache_dir()`.
+
+    numba's own `cache=True` support needs a real
+    file on disk to locate (and validate) its cache
+    entries, which is why the rewritten code can't
+    be compiled under a placeholder filename.
+    The file name contains the cache key so that
+    the file never changes once written, which
+    keeps numba's source stamp check valid.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, '{}_{}.py'.format(name, key[:32]))
+    if not os.path.exists(path):
+        if hasattr(ast, 'unparse'):
+            text = ast.unparse(tree)
+        else:  # pragma: no cover
+            text = ast.dump(tree)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(text + '\n')
+        os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+import weakref
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from time import perf_counter
+
+from numba.core import event
+
+
+LOG_ENV = 'FASTATS_COMPILE_LOG'
+
+logger = logging.getLogger('fastats.compile')
+
+
+CompileEvent = namedtuple('CompileEvent', ['name', 'stage', 'duration', 'signature'])
+CompileEvent.__doc__ = """
+A single step of building an `@fs` specialisation.
+
+`stage` is one of the names in `STAGES`; `duration` is
+in seconds (zero for the cache stages), and `signature`
+is only set for the `numba_compile` stage.
+"""
+
+
+STAGES = (
+    'cache_hit', 'cache_miss',
+    'getsource', 'parse', 'transform', 'recompile',
+    'type_inference', 'lowering', 'numba_compile',
+)
+
+# numba compiler pass name -> stage
+_NUMBA_PASSES = {
+    'nopython_type_inference': 'type_inference',
+    'native_lowering': 'lowering',
+}
+
+
+class CompileStats:
+    """
+    Thread-safe counters and cumulative durations for
+    each stage of building `@fs` specialisations, plus
+    the numba signatures compiled for each function.
+
+    Note that the AST stages of a function include the
+    time spent processing the functions it calls, and
+    the numba stages of a function include the time
+    spent compiling its callees.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = defaultdict(int)
+            self.durations = defaultdict(float)
+            self.signatures = defaultdict(list)
+
+    def record(self, compile_event):
+        with self._lock:
+            self.counts[compile_event.stage] += 1
+            self.durations[compile_event.stage] += compile_event.duration
+            if compile_event.stage == 'numba_compile':
+                self.signatures[compile_event.name].append(compile_event.signature)
+
+    def snapshot(self):
+        """
+        A plain dict copy of the current statistics.
+        """
+        with self._lock:
+            return {
+                'counts': dict(self.counts),
+                'durations': dict(self.durations),
+                'signatures': {k: list(v) for k, v in self.signatures.items()},
+            }
+
+
+stats = CompileStats()
+
+_listeners = []
+
+
+def add_listener(callback):
+    """
+    Registers `callback` to be called with every
+    `CompileEvent`, in the thread which triggered it.
+    """
+    _listeners.append(callback)
+
+
+def remove_listener(callback):
+    _listeners.remove(callback)
+
+
+def emit(name, stage, duration=0.0, signature=None):
+    compile_event = CompileEvent(name, stage, duration, signature)
+    stats.record(compile_event)
+    for callback in list(_listeners):
+        callback(compile_event)
+
+
+@contextmanager
+def timed(stage, name):
+    start = perf_counter()
+    yield
+    emit(name, stage, perf_counter() - start)
+
+
+# Only compilation of dispatchers created by fastats is reported.
+_tracked = weakref.WeakSet()
+
+
+def track(dispatcher):
+    _tracked.add(dispatcher)
+    return dispatcher
+
+
+class _NumbaListener(event.Listener):
+    """
+    Attributes numba's compile and compiler pass events to
+    the fastats dispatcher being compiled. Compilation is
+    nested when a function calls another compiled function,
+    so each thread keeps a stack of the events in progress.
+    Passes are only reported while a fastats dispatcher is
+    being compiled.
+    """
+    def __init__(self):
+        self._local = threading.local()
+
+    def _state(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+            self._local.tracked_depth = 0
+        return self._local
+
+    def on_start(self, ev):
+        state = self._state()
+        tracked = ev.kind == 'numba:compile' and ev.data['dispatcher'] in _tracked
+        state.tracked_depth += tracked
+        state.stack.append((perf_counter(), tracked))
+
+    def on_end(self, ev):
+        state = self._state()
+        start, tracked = state.stack.pop()
+        duration = perf_counter() - start
+
+        if tracked:
+            state.tracked_depth -= 1
+            dispatcher = ev.data['dispatcher']
+            # The repr of the args tuple differs between numba
+            # versions, while that of each type doesn't.
+            signature = '({})'.format(', '.join(str(a) for a in ev.data['args']))
+            emit(
+                dispatcher.py_func.__qualname__, 'numba_compile',
+                duration, signature
+            )
+        elif ev.kind == 'numba:run_pass' and state.tracked_depth:
+            pass_name = ev.data['name'].partition(' [')[0]
+            stage = _NUMBA_PASSES.get(pass_name)
+            if stage is not None:
+                emit(ev.data['qualname'], stage, duration)
+
+
+_numba_listener = _NumbaListener()
+for _kind in ('numba:compile', 'numba:run_pass'):
+    event.register(_kind, _numba_listener)
+
+
+def _log(compile_event):
+    logger.info(
+        'fastats %s %s %.6fs %s', compile_event.stage, compile_event.name,
+        compile_event.duration, compile_event.signature or ''
+    )
+
+
+if os.environ.get(LOG_ENV):  # pragma: no cover
+    add_listener(_log)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,92 @@
+import numpy as np
+from numba.core import types
+from numba.extending import overload
+from numba.np.numpy_support import is_nonelike
+
+
+def result_array(x, out, dtype):
+    """
+    The array a pass over `x` writes its results
+    into: `out` if it's given, otherwise a new
+    (uninitialised) array with the shape of `x`,
+    of type `dtype` or the type of `x` if that's
+    `None`.
+
+    >>> x = np.arange(3.0)
+    >>> result_array(x, None, None).dtype
+    dtype('float64')
+    >>> result_array(x, None, np.float32).dtype
+    dtype('float32')
+    >>> out = np.zeros(3)
+    >>> result_array(x, out, np.float32) is out
+    True
+    """
+    if out is not None:
+        return out
+    if dtype is not None:
+        return np.empty(x.shape, dtype)
+    return np.empty_like(x)
+
+
+@overload(result_array)
+def _result_array(x, out, dtype):
+    # numba can't type a variable which is one of several
+    # array types depending on the arguments, so the
+    # choice is made at compile time instead.
+    if not is_nonelike(out):
+        return lambda x, out, dtype: out
+    if not is_nonelike(dtype):
+        return lambda x, out, dtype: np.empty(x.shape, dtype)
+    return lambda x, out, dtype: np.empty_like(x)
+
+
+def nan_array(x, out, dtype):
+    """
+    The same as `result_array`, but a new array is
+    filled with NaN (as `np.full_like(x, np.nan)`), for
+    passes which leave values without a result. `out`
+    is returned as it is, and must be a floating point
+    array so that the pass can write NaN to it.
+
+    >>> nan_array(np.arange(3.0), None, None)
+    array([nan, nan, nan])
+    >>> nan_array(np.arange(3), None, np.float32)
+    array([nan, nan, nan], dtype=float32)
+    >>> nan_array(np.arange(3.0), np.empty(3, dtype=int), None)
+    Traceback (most recent call last):
+        ...
+    TypeError: out must be a floating point array, to hold NaN
+    """
+    if out is not None:
+        if out.dtype.kind not in 'fc':
+            raise TypeError(_NAN_OUT_MESSAGE)
+        return out
+    if dtype is not None:
+        return np.full(x.shape, np.nan, dtype)
+    return np.full_like(x, np.nan)
+
+
+_NAN_OUT_MESSAGE = 'out must be a floating point array, to hold NaN'
+
+
+@overload(nan_array)
+def _nan_array(x, out, dtype):
+    if not is_nonelike(out):
+        if isinstance(out.dtype, (types.Float, types.Complex)):
+            return lambda x, out, dtype: out
+
+        def integer_out(x, out, dtype):  # pragma: no cover
+            # Raising unconditionally would leave numba
+            # without a return type for the caller.
+            if out.size >= 0:
+                raise TypeError(_NAN_OUT_MESSAGE)
+            return out
+        return integer_out
+    if not is_nonelike(dtype):
+        return lambda x, out, dtype: np.full(x.shape, np.nan, dtype)
+    return lambda x, out, dtype: np.full_like(x, np.nan)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
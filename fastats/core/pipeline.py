@@ -0,0 +1,198 @@
+import operator
+from functools import partial
+from threading import Lock
+
+import numpy as np
+
+from fastats.core.codegen import define
+from fastats.core.decorator import fs
+from fastats.core.output import result_array
+from fastats.core.single_pass import single_pass
+from fastats.core.windowed_pass import windowed_pass
+
+
+_KERNELS = {}
+_KERNELS_LOCK = Lock()
+
+
+def _stage(x):  # pragma: no cover
+    return x
+
+
+class Pipeline:
+    """
+    A chain of passes compiled into a single kernel;
+    see `pipeline`.
+    """
+    def __init__(self, kinds, overrides):
+        self._kinds = kinds
+        self._overrides = overrides
+        self._kernel = kernel(kinds)
+
+    def __call__(self, x, out=None, dtype=None, **kwargs):
+        return self._kernel(x, out=out, dtype=dtype, **self._overrides, **kwargs)
+
+    def __repr__(self):
+        stages = ', '.join(
+            'windowed_pass({})'.format(win) if win else 'single_pass'
+            for win in self._kinds
+        )
+        return 'pipeline({})'.format(stages)
+
+
+def pipeline(*stages):
+    """
+    Fuses a chain of `single_pass` and `windowed_pass`
+    calls into one compiled loop over `x`, with each
+    stage applied to the results of the one before.
+
+    Stages are given as `functools.partial` objects
+    holding the pass with its `value` function (and
+    `win` for windowed passes):
+
+    >>> from functools import partial
+    >>> def square(x):
+    ...     return x * x
+    >>> def mean(x):
+    ...     return np.sum(x) / x.size
+    >>> square_then_mean = pipeline(
+    ...     partial(single_pass, value=square),
+    ...     partial(windowed_pass, win=3, value=mean),
+    ... )
+    >>> square_then_mean(np.arange(6.0))
+    array([      nan,       nan, 1.66666667, 4.66666667, 9.66666667,
+           16.66666667])
+
+    This gives the same result as running the passes
+    one after another:
+
+    >>> windowed_pass(single_pass(np.arange(6.0), value=square), 3, value=mean)
+    array([      nan,       nan, 1.66666667, 4.66666667, 9.66666667,
+           16.66666667])
+
+    but without allocating (and walking over) an
+    array for each intermediate result. Only the
+    last `win` results of each stage which feeds a
+    windowed pass are kept, in a small ring buffer.
+
+    The pipeline accepts `out=` and `dtype=` as the
+    passes do, and fastats keywords such as
+    `jit_options`; the ring buffers use the type of
+    the result. The first stage sees `x` exactly as
+    the pass would, but every stage must return a
+    scalar.
+    """
+    if not stages:
+        raise ValueError('A pipeline needs at least one stage')
+
+    kinds = []
+    overrides = {}
+    for i, stage in enumerate(stages):
+        if not isinstance(stage, partial) or stage.func not in (single_pass, windowed_pass):
+            raise TypeError(
+                'Pipeline stages must be partials of single_pass or '
+                'windowed_pass, not {!r}'.format(stage)
+            )
+        if stage.args:
+            raise TypeError('Pipeline stages take keyword arguments only, '
+                            'such as partial(windowed_pass, win=5, value=f)')
+
+        keywords = dict(stage.keywords)
+        if 'out' in keywords or 'dtype' in keywords:
+            raise TypeError('out and dtype are passed to the pipeline, not its stages')
+
+        win = keywords.pop('win', 0) if stage.func is windowed_pass else 0
+        if stage.func is windowed_pass:
+            # numpy integers are accepted, as they are by windowed_pass.
+            try:
+                win = operator.index(win)
+            except TypeError:
+                win = 0
+            if win < 1:
+                raise ValueError('windowed_pass stages need a positive integer win')
+        kinds.append(win)
+
+        func = keywords.pop('value', None)
+        if func is None:
+            raise TypeError('Each pipeline stage needs a value function')
+        overrides['stage_{}'.format(i)] = func
+
+        # Any other overrides apply throughout the pipeline.
+        for name, override in keywords.items():
+            if overrides.setdefault(name, override) is not override:
+                raise ValueError('Stages disagree on the override for {!r}'.format(name))
+
+    return Pipeline(tuple(kinds), overrides)
+
+
+def kernel(kinds):
+    """
+    The `@fs` function looping over `x` for a
+    pipeline whose stages are described by `kinds`
+    (the window size of each stage, or 0 for a
+    single pass). Each stage calls `stage_<i>`,
+    which the pipeline overrides with its `value`
+    function.
+    """
+    with _KERNELS_LOCK:
+        if kinds not in _KERNELS:
+            _KERNELS[kinds] = fs(_generate(kinds))
+        return _KERNELS[kinds]
+
+
+def _generate(kinds):
+    lines = [
+        'def fused_pass(x, out=None, dtype=None):',
+        '    result = result_array(x, out, dtype)',
+    ]
+    for i, win in enumerate(kinds):
+        if win and i > 0:
+            lines += [
+                '    buf_{} = np.empty(2 * {}, result.dtype)'.format(i, win),
+                '    pos_{} = 0'.format(i),
+            ]
+
+    lines.append('    for i in range(x.shape[0]):')
+    previous = None
+    for i, win in enumerate(kinds):
+        stage = 'stage_{}'.format(i)
+        name = 'v_{}'.format(i)
+        if not win:
+            arg = 'x[i]' if previous is None else previous
+            lines.append('        {} = {}({})'.format(name, stage, arg))
+        else:
+            if previous is None:
+                window = 'x[i - {0} + 1:i + 1]'.format(win)
+            else:
+                # Each value is written twice, so the last
+                # `win` values are always a contiguous slice
+                # starting at the (next) write position.
+                lines += [
+                    '        buf_{0}[pos_{0}] = {1}'.format(i, previous),
+                    '        buf_{0}[pos_{0} + {2}] = {1}'.format(i, previous, win),
+                    '        pos_{0} += 1'.format(i),
+                    '        if pos_{0} == {1}:'.format(i, win),
+                    '            pos_{0} = 0'.format(i),
+                ]
+                window = 'buf_{0}[pos_{0}:pos_{0} + {1}]'.format(i, win)
+            lines += [
+                '        if i >= {}:'.format(win - 1),
+                '            {} = {}({})'.format(name, stage, window),
+                '        else:',
+                '            {} = np.nan'.format(name),
+            ]
+        previous = name
+
+    lines += [
+        '        result[i] = {}'.format(previous),
+        '    return result',
+    ]
+
+    namespace = {'np': np, 'result_array': result_array, '__name__': __name__}
+    namespace.update(('stage_{}'.format(i), _stage) for i in range(len(kinds)))
+    return define('\n'.join(lines) + '\n', 'fused_pass', namespace)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,158 @@
+from inspect import Parameter, signature
+from threading import Lock
+
+from numba import float32, float64
+from numba.core.types import Omitted
+
+from fastats.core import disk_cache
+from fastats.core.ast_transforms.processor import AstProcessor
+
+
+_JITTED = {}
+_jitted_lock = Lock()
+
+
+def jitted(func, cache_dir=None, **jit_options):
+    """
+    Returns the compiled version of the plain python
+    function `func`.
+
+    Any (plain python) functions called by `func` are
+    compiled as well, in the same way `@fs` does. The
+    result is shared, so each function is only
+    compiled once per process (for each `cache_dir`
+    and set of numba `jit_options`). If `cache_dir`
+    is given, the compiled code is persisted there
+    between processes.
+
+    >>> def add(a, b):
+    ...     return a + b
+    >>> jitted(add) is jitted(add)
+    True
+    >>> jitted(add)(1, 2)
+    3
+    """
+    key = (func, cache_dir, tuple(sorted(jit_options.items())))
+    with _jitted_lock:
+        dispatcher = _JITTED.get(key)
+        if dispatcher is None:
+            dispatcher = AstProcessor(
+                func, {}, jit_options=jit_options, cache_dir=cache_dir
+            ).process()
+            _JITTED[key] = dispatcher
+    return dispatcher
+
+
+def precompile(func, signatures, **overrides):
+    """
+    Eagerly compiles `func` for each of the numba
+    `signatures`, returning the compiled function.
+
+    `func` can be an `@fs` decorated function, in which
+    case any keyword `overrides` select the specialisation
+    to compile, or a plain python function.
+
+    This avoids paying the compilation cost on the first
+    call with each combination of dtypes/dimensions, and
+    when combined with the on-disk cache (see
+    `fastats.core.disk_cache`) can be run at build time.
+    Plain python functions are compiled as
+    `fastats.jit` compiles them, persisting the
+    result to the same directory.
+
+    Signatures given as tuples of argument types can
+    leave out trailing parameters with defaults, which
+    are compiled as omitted.
+
+    >>> from fastats import single_pass
+    >>> def double(x):
+    ...     return x * 2
+    >>> compiled = precompile(single_pass, [(float64[::1],)], value=double)
+    >>> str(compiled.signatures[0][0])
+    'array(float64, 1d, C)'
+    >>> compiled(np.arange(3.0))
+    array([0., 2., 4.])
+    """
+    if hasattr(func, 'specialise'):
+        dispatcher = func.specialise(**overrides)
+    elif overrides:
+        raise TypeError('Overrides can only be passed for @fs decorated functions')
+    else:
+        dispatcher = jitted(func, cache_dir=disk_cache.jit_cache_dir())
+
+    for sig in signatures:
+        dispatcher.compile(_with_defaults(dispatcher, sig))
+    return dispatcher
+
+
+def _with_defaults(dispatcher, sig):
+    if not isinstance(sig, tuple):
+        return sig
+
+    params = list(signature(dispatcher.py_func).parameters.values())
+    omitted = tuple(
+        Omitted(p.default) for p in params[len(sig):]
+        if p.default is not Parameter.empty
+    )
+    return sig + omitted
+
+
+_ARRAYS_1D = (float64[::1], float32[::1])
+_ARRAYS_2D = (float64[:, ::1], float32[:, ::1])
+
+
+def _warmup_signatures():
+    """
+    The functions compiled by `warmup`, along with the
+    signatures compiled for each. Imported lazily as
+    most of these modules depend on this one.
+    """
+    from fastats.maths.correlation import pearson, pearson_pairwise, spearman, spearman_pairwise
+    from fastats.maths.ewma import ewma, ewma_2d
+    from fastats.scaling import standard, min_max, demean, rank
+
+    return {
+        ewma: [(a, float64) for a in _ARRAYS_1D],
+        ewma_2d: [(a, float64) for a in _ARRAYS_2D],
+        standard: [(a,) for a in _ARRAYS_2D],
+        min_max: [(a,) for a in _ARRAYS_2D],
+        demean: [(a,) for a in _ARRAYS_2D],
+        rank: [(a,) for a in _ARRAYS_2D],
+        pearson: [(a, a) for a in _ARRAYS_1D],
+        spearman: [(a, a) for a in _ARRAYS_1D],
+        pearson_pairwise: [(a,) for a in _ARRAYS_2D],
+        spearman_pairwise: [(a,) for a in _ARRAYS_2D],
+    }
+
+
+def warmup(funcs=None):
+    """
+    Compiles the common float64/float32, 1-D/2-D
+    signatures of `ewma`, the scalers and the
+    correlation functions, as used by `fastats.jit`.
+
+    The core passes aren't included, as they're only
+    compiled when called with a `value` function;
+    use `precompile` with the overrides you call them
+    with instead.
+
+    The compiled code is persisted to the same
+    directory as `fastats.jit` uses, so this can be
+    run when building an image.
+
+    Pass `funcs` to only compile a subset of these.
+    Returns a dict of function to its compiled version.
+    """
+    signatures = _warmup_signatures()
+    if funcs is not None:
+        signatures = {f: signatures[f] for f in funcs}
+
+    return {
+        func: precompile(func, sigs)
+        for func, sigs in signatures.items()
+    }
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,764 @@
+"""
+Rolling window statistics, as `value` kernels for
+`windowed_stateful_pass` along with functions
+applying them.
+
+The kernels update their state as the window moves
+instead of re-scanning each window, so they take
+O(1) (amortised) time per step rather than O(win).
+The minimum/maximum kernels (`window_max` etc.) need
+their state created by `deque_state`:
+
+    windowed_stateful_pass(x, win, value=window_max, initial_state=deque_state)
+"""
+
+import numpy as np
+
+from fastats.core.windowed_stateful_pass import windowed_stateful_pass, windowed_stateful_pass_parallel
+
+
+# The counters of the monotonic deque kernels: the index (in
+# `x` as a whole) of the newest value, the head and size of the
+# deque and the index of the most recent NaN. The deque itself
+# is a ring buffer of the indices of the candidate extremes.
+_DEQUE = np.dtype([
+    ('step', np.int64), ('head', np.int64), ('size', np.int64), ('last_nan', np.int64)
+])
+
+
+def deque_state(x, win):
+    """
+    The `initial_state` of the monotonic deque kernels
+    (`window_max` etc.): a record of counters and a
+    ring buffer of `win` indices.
+    """
+    counters = np.zeros(1, dtype=_DEQUE)
+    counters[0]['step'] = -1
+    counters[0]['last_nan'] = -1
+    return counters, np.empty(win, dtype=np.int64)
+
+
+def _deque_push(x, counters, queue, idx, start, sign):
+    """
+    Adds the value at index `idx` to the monotonic
+    deque, after removing those which can no longer
+    be the extreme value while it's in the window.
+    `sign` is 1 for maximums and -1 for minimums;
+    `start` is the index of `x[0]`.
+    """
+    value = x[idx - start]
+    if np.isnan(value):
+        counters['last_nan'] = idx
+        return
+
+    capacity = queue.shape[0]
+    head = counters['head']
+    size = counters['size']
+    while size > 0:
+        back = head + size - 1
+        if back >= capacity:
+            back -= capacity
+        # Equal values are kept, so the front is always
+        # the first occurrence of the extreme value.
+        if sign * x[queue[back] - start] < sign * value:
+            size -= 1
+        else:
+            break
+
+    tail = head + size
+    if tail >= capacity:
+        tail -= capacity
+    queue[tail] = idx
+    counters['size'] = size + 1
+
+
+def _deque_update(x, state, sign, skip_nan):
+    """
+    Moves the deque in `state` on to the window `x`
+    (filling it from the first window), returning the
+    position in the window of its extreme value, or -1
+    if there isn't one: if the window only holds NaNs,
+    or holds any NaN and `skip_nan` is False.
+    """
+    records, queue = state
+    counters = records[0]
+    if counters['step'] < 0:
+        start = 0
+        for idx in range(x.shape[0]):
+            _deque_push(x, counters, queue, idx, start, sign)
+        counters['step'] = x.shape[0] - 1
+    else:
+        step = counters['step'] + 1
+        start = step - x.shape[0] + 1
+        counters['step'] = step
+
+        capacity = queue.shape[0]
+        head = counters['head']
+        size = counters['size']
+        while size > 0 and queue[head] < start:
+            head += 1
+            if head == capacity:
+                head = 0
+            size -= 1
+        counters['head'] = head
+        counters['size'] = size
+
+        _deque_push(x, counters, queue, step, start, sign)
+
+    if not skip_nan and counters['last_nan'] >= start:
+        return -1
+    if counters['size'] == 0:
+        return -1
+    return queue[counters['head']] - start
+
+
+def _extreme(x, position):
+    if position < 0:
+        return np.nan
+    return x[position]
+
+
+def _position(position):
+    if position < 0:
+        return np.nan
+    return position
+
+
+def window_max(x, val_in, val_out, state):
+    """
+    The maximum of the window, or NaN if it holds
+    any NaNs.
+
+    >>> x = np.array([1., 3., 2., 5., 4., 0.])
+    >>> windowed_stateful_pass(x, 3, value=window_max, initial_state=deque_state)
+    array([nan, nan,  3.,  5.,  5.,  5.])
+    """
+    position = _deque_update(x, state, 1.0, False)
+    return _extreme(x, position), state
+
+
+def window_min(x, val_in, val_out, state):
+    """
+    The minimum of the window, or NaN if it holds
+    any NaNs.
+    """
+    position = _deque_update(x, state, -1.0, False)
+    return _extreme(x, position), state
+
+
+def window_argmax(x, val_in, val_out, state):
+    """
+    The position in the window of its (first)
+    maximum, or NaN if it holds any NaNs.
+    """
+    position = _deque_update(x, state, 1.0, False)
+    return _position(position), state
+
+
+def window_argmin(x, val_in, val_out, state):
+    """
+    The position in the window of its (first)
+    minimum, or NaN if it holds any NaNs.
+    """
+    position = _deque_update(x, state, -1.0, False)
+    return _position(position), state
+
+
+def window_nanmax(x, val_in, val_out, state):
+    """
+    The maximum of the window ignoring NaNs, or NaN
+    if it only holds NaNs.
+
+    >>> x = np.array([1., np.nan, 2., np.nan, np.nan, 0.])
+    >>> windowed_stateful_pass(x, 2, value=window_nanmax, initial_state=deque_state)
+    array([nan,  1.,  2.,  2., nan,  0.])
+    """
+    position = _deque_update(x, state, 1.0, True)
+    return _extreme(x, position), state
+
+
+def window_nanmin(x, val_in, val_out, state):
+    """
+    The minimum of the window ignoring NaNs, or NaN
+    if it only holds NaNs.
+    """
+    position = _deque_update(x, state, -1.0, True)
+    return _extreme(x, position), state
+
+
+def window_nanargmax(x, val_in, val_out, state):
+    """
+    The position in the window of its (first)
+    maximum ignoring NaNs, or NaN if it only holds
+    NaNs.
+    """
+    position = _deque_update(x, state, 1.0, True)
+    return _position(position), state
+
+
+def window_nanargmin(x, val_in, val_out, state):
+    """
+    The position in the window of its (first)
+    minimum ignoring NaNs, or NaN if it only holds
+    NaNs.
+    """
+    position = _deque_update(x, state, -1.0, True)
+    return _position(position), state
+
+
+def _stateful_pass(x, win, value, initial_state):
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim not in (1, 2):
+        raise ValueError('Expected a 1 or 2-dimensional array')
+    if not 1 <= win <= x.shape[0]:
+        raise ValueError('The window must hold between 1 and len(x) values')
+
+    if x.ndim == 2:
+        return windowed_stateful_pass_parallel(x, win, value=value, initial_state=initial_state)
+    return windowed_stateful_pass(x, win, value=value, initial_state=initial_state)
+
+
+def rolling_max(x, win, skipna=False):
+    """
+    The maximum of each window of `win` values of the
+    array `x` (as floats), in O(n) time using a
+    monotonic deque.
+
+    As with `windowed_pass`, the first `win - 1`
+    values are NaN. Windows holding NaNs give NaN,
+    unless `skipna` is True, in which case NaNs are
+    ignored (and only windows of NaNs give NaN).
+
+    For a 2-dimensional `x` the columns are treated
+    as separate series, which are processed in
+    parallel (see `windowed_stateful_pass_parallel`).
+
+    >>> x = np.array([4., 2., 3., 1., 0., 6.])
+    >>> rolling_max(x, 3)
+    array([nan, nan,  4.,  3.,  3.,  6.])
+    >>> rolling_max(np.column_stack([x, x[::-1]]), 3)[2:]
+    array([[4., 6.],
+           [3., 3.],
+           [3., 3.],
+           [6., 4.]])
+    """
+    return _stateful_pass(x, win, window_nanmax if skipna else window_max, deque_state)
+
+
+def rolling_min(x, win, skipna=False):
+    """
+    The minimum of each window of `win` values of
+    `x`; see `rolling_max`.
+
+    >>> x = np.array([4., 2., 3., 1., 0., 6.])
+    >>> rolling_min(x, 3)
+    array([nan, nan,  2.,  1.,  0.,  0.])
+    """
+    return _stateful_pass(x, win, window_nanmin if skipna else window_min, deque_state)
+
+
+def rolling_argmax(x, win, skipna=False):
+    """
+    The position within each window of `win` values
+    of `x` of its first maximum (as `np.argmax`, as a
+    float so it can be NaN); see `rolling_max`.
+
+    >>> x = np.array([4., 2., 3., 1., 0., 6.])
+    >>> rolling_argmax(x, 3)
+    array([nan, nan,  0.,  1.,  0.,  2.])
+    """
+    return _stateful_pass(x, win, window_nanargmax if skipna else window_argmax, deque_state)
+
+
+def rolling_argmin(x, win, skipna=False):
+    """
+    The position within each window of `win` values
+    of `x` of its first minimum; see `rolling_argmax`.
+
+    >>> x = np.array([4., 2., 3., 1., 0., 6.])
+    >>> rolling_argmin(x, 3)
+    array([nan, nan,  1.,  2.,  2.,  1.])
+    """
+    return _stateful_pass(x, win, window_nanargmin if skipna else window_argmin, deque_state)
+
+
+# The indexable skiplist used by the rolling quantiles: node
+# `i % win` holds `x[i]` while it's in the window, and nodes
+# `win` and `win + 1` are the head and end of the list. Each
+# link records its width, the number of values it skips over,
+# so the k-th smallest value is found in O(log win) time.
+def _skiplist(win):
+    levels = 1
+    while (1 << levels) < win:
+        levels += 1
+    nodes = win + 2
+    values = np.empty(nodes)
+    links = np.full((nodes, levels), win + 1, dtype=np.int64)
+    widths = np.ones((nodes, levels), dtype=np.int64)
+    heights = np.ones(nodes, dtype=np.int64)
+    return values, links, widths, heights
+
+
+def _skiplist_insert(values, links, widths, heights, chain, steps, node, value):
+    """
+    Inserts `value` as `node`, after any equal values
+    so these stay in the order they were added.
+    """
+    levels = links.shape[1]
+    end = links.shape[0] - 1
+    current = end - 1
+    for level in range(levels - 1, -1, -1):
+        steps[level] = 0
+        following = links[current, level]
+        while following != end and values[following] <= value:
+            steps[level] += widths[current, level]
+            current = following
+            following = links[current, level]
+        chain[level] = current
+
+    height = 1
+    while height < levels and np.random.random() < 0.5:
+        height += 1
+    values[node] = value
+    heights[node] = height
+
+    skipped = 0
+    for level in range(height):
+        previous = chain[level]
+        links[node, level] = links[previous, level]
+        links[previous, level] = node
+        widths[node, level] = widths[previous, level] - skipped
+        widths[previous, level] = skipped + 1
+        skipped += steps[level]
+    for level in range(height, levels):
+        widths[chain[level], level] += 1
+
+
+def _skiplist_remove(values, links, widths, heights, chain, value):
+    """
+    Removes the first node holding `value`, which is
+    the oldest of the equal values.
+    """
+    levels = links.shape[1]
+    end = links.shape[0] - 1
+    current = end - 1
+    for level in range(levels - 1, -1, -1):
+        following = links[current, level]
+        while following != end and values[following] < value:
+            current = following
+            following = links[current, level]
+        chain[level] = current
+
+    node = links[chain[0], 0]
+    for level in range(heights[node]):
+        previous = chain[level]
+        widths[previous, level] += widths[node, level] - 1
+        links[previous, level] = links[node, level]
+    for level in range(heights[node], links.shape[1]):
+        widths[chain[level], level] -= 1
+
+
+def _skiplist_get(values, links, widths, k):
+    """
+    The k-th (from 0) smallest value in the list.
+    """
+    current = links.shape[0] - 2
+    k += 1
+    for level in range(links.shape[1] - 1, -1, -1):
+        while widths[current, level] <= k:
+            k -= widths[current, level]
+            current = links[current, level]
+    return values[current]
+
+
+def _rolling_quantiles(x, win, qs, skipna, out):
+    values, links, widths, heights = _skiplist(win)
+    chain = np.empty(links.shape[1], dtype=np.int64)
+    steps = np.empty(links.shape[1], dtype=np.int64)
+    size = 0
+    nans = 0
+    for i in range(x.shape[0]):
+        if i >= win:
+            leaving = x[i - win]
+            if np.isnan(leaving):
+                nans -= 1
+            else:
+                _skiplist_remove(values, links, widths, heights, chain, leaving)
+                size -= 1
+
+        if np.isnan(x[i]):
+            nans += 1
+        else:
+            _skiplist_insert(values, links, widths, heights, chain, steps, i % win, x[i])
+            size += 1
+
+        if i < win - 1 or size == 0 or (nans > 0 and not skipna):
+            out[i, :] = np.nan
+            continue
+
+        # Linear interpolation between the closest ranks,
+        # as with the default method of `np.quantile`.
+        for j in range(qs.shape[0]):
+            position = qs[j] * (size - 1)
+            below = int(np.floor(position))
+            fraction = position - below
+            lower = _skiplist_get(values, links, widths, below)
+            if fraction > 0:
+                upper = _skiplist_get(values, links, widths, below + 1)
+                out[i, j] = lower + (upper - lower) * fraction
+            else:
+                out[i, j] = lower
+
+
+def rolling_quantile(x, win, q, skipna=False):
+    """
+    The quantile(s) `q` of each window of `win` values
+    of the 1-dimensional array `x`, interpolating
+    linearly between values as `np.quantile` does.
+
+    The window is held in an indexable skiplist which
+    is updated as it moves, taking O(log win) time
+    per step and quantile rather than sorting every
+    window.
+
+    `q` is a number between 0 and 1, giving a result
+    the same shape as `x`, or a sequence of them,
+    computed in the same pass and returned as the
+    columns of an array of shape `(len(x), len(q))`.
+
+    The first `win - 1` rows are NaN. Windows holding
+    NaNs give NaN, unless `skipna` is True, in which
+    case the quantiles are of the other values (as
+    `np.nanquantile`).
+
+    >>> x = np.array([3., 1., 4., 1., 5., 9., 2.])
+    >>> rolling_quantile(x, 4, 0.25)
+    array([ nan,  nan,  nan, 1.  , 1.  , 3.25, 1.75])
+    >>> rolling_quantile(x, 3, [0., 1.])[2:]
+    array([[1., 4.],
+           [1., 4.],
+           [1., 5.],
+           [1., 9.],
+           [2., 9.]])
+    """
+    x = np.asarray(x, dtype=np.float64)
+    qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    if x.ndim != 1:
+        raise ValueError('rolling_quantile expects a 1-dimensional array')
+    if qs.ndim != 1 or not np.all((qs >= 0) & (qs <= 1)):
+        raise ValueError('Quantiles must be between 0 and 1')
+    if win < 1:
+        raise ValueError('The window must hold at least one value')
+
+    from fastats.core.precompile import jitted
+
+    out = np.empty((x.shape[0], qs.shape[0]))
+    jitted(_rolling_quantiles)(x, int(win), qs, bool(skipna), out)
+    return out[:, 0] if np.ndim(q) == 0 else out
+
+
+def rolling_median(x, win, skipna=False):
+    """
+    The median of each window of `win` values of `x`;
+    see `rolling_quantile`.
+
+    >>> x = np.array([3., 1., 4., 1., 5., np.nan, 2.])
+    >>> rolling_median(x, 3)
+    array([nan, nan,  3.,  1.,  4., nan, nan])
+    >>> rolling_median(x, 3, skipna=True)
+    array([nan, nan,  3. ,  1. ,  4. ,  3. ,  3.5])
+    """
+    return rolling_quantile(x, win, 0.5, skipna=skipna)
+
+
+# The state of the moment kernels: the number of (non-NaN)
+# values, their mean and the sums of their 2nd to 4th powers
+# about the mean, followed by the Kahan compensation for each
+# of those sums, the number of NaNs, the number of steps since
+# the moments were last re-computed from the window, and the
+# newest value and how many times in a row it's been added, to
+# recognise windows of a single value exactly.
+_COUNT = 0
+_MEAN = 1
+_M2 = 2
+_M3 = 3
+_M4 = 4
+_COMPENSATION = 4
+_NANS = 9
+_AGE = 10
+_LAST = 11
+_REPEATS = 12
+_MOMENTS = ('mean', 'var', 'std', 'skew', 'kurt')
+
+
+def _compensated_add(state, idx, term):
+    y = term - state[idx + _COMPENSATION]
+    total = state[idx] + y
+    state[idx + _COMPENSATION] = (total - state[idx]) - y
+    state[idx] = total
+
+
+def _moments_anchor(x, state):
+    """
+    Sets the moments in `state` to those of the window
+    `x`, computed directly (with two passes) to
+    discard the rounding errors built up by updating
+    them.
+    """
+    state[:] = 0
+    total = 0.0
+    for i in range(x.shape[0]):
+        if np.isnan(x[i]):
+            state[_NANS] += 1
+        else:
+            state[_COUNT] += 1
+            total += x[i]
+            if x[i] == state[_LAST] and state[_REPEATS] > 0:
+                state[_REPEATS] += 1
+            else:
+                state[_LAST] = x[i]
+                state[_REPEATS] = 1
+    if state[_COUNT] == 0:
+        return
+
+    mean = total / state[_COUNT]
+    m2 = 0.0
+    m3 = 0.0
+    m4 = 0.0
+    for i in range(x.shape[0]):
+        if not np.isnan(x[i]):
+            delta = x[i] - mean
+            delta2 = delta * delta
+            m2 += delta2
+            m3 += delta2 * delta
+            m4 += delta2 * delta2
+    state[_MEAN] = mean
+    state[_M2] = m2
+    state[_M3] = m3
+    state[_M4] = m4
+
+
+def _moments_add(state, value):
+    """
+    Adds `value` to the moments in `state`, using the
+    updates of Welford and Terriberry.
+    """
+    if np.isnan(value):
+        state[_NANS] += 1
+        return
+
+    n = state[_COUNT] + 1
+    delta = value - state[_MEAN]
+    delta_n = delta / n
+    delta_n2 = delta_n * delta_n
+    term = delta * delta_n * (n - 1)
+    m2 = state[_M2]
+    m3 = state[_M3]
+    _compensated_add(state, _M4, term * delta_n2 * (n * n - 3 * n + 3) + 6 * delta_n2 * m2 - 4 * delta_n * m3)
+    _compensated_add(state, _M3, term * delta_n * (n - 2) - 3 * delta_n * m2)
+    _compensated_add(state, _M2, term)
+    _compensated_add(state, _MEAN, delta_n)
+    state[_COUNT] = n
+
+    if value == state[_LAST] and state[_REPEATS] > 0:
+        state[_REPEATS] += 1
+    else:
+        state[_LAST] = value
+        state[_REPEATS] = 1
+
+
+def _moments_remove(state, value):
+    """
+    Removes `value` from the moments in `state`, by
+    reversing `_moments_add`.
+    """
+    if np.isnan(value):
+        state[_NANS] -= 1
+        return
+
+    n = state[_COUNT]
+    if n <= 1:
+        state[_COUNT:_NANS] = 0
+        return
+
+    delta_n = (value - state[_MEAN]) / (n - 1)
+    delta_n2 = delta_n * delta_n
+    term = delta_n * n * delta_n * (n - 1)
+    _compensated_add(state, _M2, -term)
+    m2 = state[_M2]
+    _compensated_add(state, _M3, 3 * delta_n * m2 - term * delta_n * (n - 2))
+    m3 = state[_M3]
+    _compensated_add(state, _M4, 4 * delta_n * m3 - 6 * delta_n2 * m2 - term * delta_n2 * (n * n - 3 * n + 3))
+    _compensated_add(state, _MEAN, -delta_n)
+    state[_COUNT] = n - 1
+    if n == 2:
+        # The sums for a single value are exactly zero.
+        state[_M2:_M4 + 1] = 0
+        state[_M2 + _COMPENSATION:_M4 + _COMPENSATION + 1] = 0
+
+
+def _moments_update(x, val_in, val_out, state):
+    """
+    Moves the moments in `state` on to the window `x`
+    (creating them for the first window), re-computing
+    them every `len(x)` steps.
+    """
+    if state.size == 0:
+        state = np.empty(_REPEATS + 1, dtype=x.dtype)
+        _moments_anchor(x, state)
+    elif state[_AGE] + 1 >= x.shape[0]:
+        _moments_anchor(x, state)
+    else:
+        state[_AGE] += 1
+        _moments_remove(state, val_out)
+        _moments_add(state, val_in)
+    return state
+
+
+def _moment(state, moment, ddof, skip_nan):
+    """
+    The moment (an index into `_MOMENTS`) of the
+    values described by `state`.
+    """
+    n = state[_COUNT]
+    if n == 0 or (state[_NANS] > 0 and not skip_nan):
+        return np.nan
+
+    # The window only holds one value (possibly repeated),
+    # which the updates may not have given exactly.
+    constant = state[_REPEATS] >= n
+    if moment == 0:
+        return state[_LAST] if constant else state[_MEAN]
+
+    m2 = 0.0 if constant else max(state[_M2], 0.0)
+    if moment == 1 or moment == 2:
+        if n <= ddof:
+            return np.nan
+        var = m2 / (n - ddof)
+        return var if moment == 1 else np.sqrt(var)
+
+    if m2 == 0:
+        return np.nan
+    if moment == 3:
+        return np.sqrt(n) * state[_M3] / m2 ** 1.5
+    return n * state[_M4] / (m2 * m2) - 3
+
+
+def window_mean(x, val_in, val_out, state):
+    """
+    The mean of the window, or NaN if it holds any
+    NaNs, updated in O(1) time per step.
+
+    >>> x = np.array([1., 2., 3., 4., 5.])
+    >>> windowed_stateful_pass(x, 2, value=window_mean)
+    array([nan, 1.5, 2.5, 3.5, 4.5])
+    """
+    state = _moments_update(x, val_in, val_out, state)
+    return _moment(state, 0, 0, False), state
+
+
+def window_var(x, val_in, val_out, state):
+    """
+    The (population) variance of the window, or NaN
+    if it holds any NaNs.
+    """
+    state = _moments_update(x, val_in, val_out, state)
+    return _moment(state, 1, 0, False), state
+
+
+def window_std(x, val_in, val_out, state):
+    """
+    The (population) standard deviation of the
+    window, or NaN if it holds any NaNs.
+    """
+    state = _moments_update(x, val_in, val_out, state)
+    return _moment(state, 2, 0, False), state
+
+
+def window_skew(x, val_in, val_out, state):
+    """
+    The (biased) skewness of the window, or NaN if it
+    holds any NaNs or its values are all equal.
+    """
+    state = _moments_update(x, val_in, val_out, state)
+    return _moment(state, 3, 0, False), state
+
+
+def window_kurt(x, val_in, val_out, state):
+    """
+    The (biased) excess kurtosis of the window, or NaN
+    if it holds any NaNs or its values are all equal.
+    """
+    state = _moments_update(x, val_in, val_out, state)
+    return _moment(state, 4, 0, False), state
+
+
+def _rolling_moments(x, win, moments, ddof, skipna, out):
+    state = np.empty(0, dtype=x.dtype)
+    out[:win - 1, :] = np.nan
+    for i in range(win, x.shape[0] + 1):
+        start = i - win
+        val_out = x[start - 1] if start > 0 else np.nan
+        state = _moments_update(x[start:i], x[i - 1], val_out, state)
+        for j in range(moments.shape[0]):
+            out[i - 1, j] = _moment(state, moments[j], ddof, skipna)
+
+
+def rolling_moments(x, win, moments=('mean', 'std'), ddof=0, skipna=False):
+    """
+    Moments of each window of `win` values of the
+    1-dimensional array `x`: any of 'mean', 'var',
+    'std', 'skew' and 'kurt'.
+
+    The sums behind the moments are updated as values
+    enter and leave the window, taking O(1) time per
+    step, rather than being re-computed from every
+    window. The updates are numerically stable
+    (Welford's, with Kahan summation), and the sums
+    are re-computed from the window every `win` steps
+    so rounding errors can't build up over long series.
+
+    `moments` is the name of one moment, giving a
+    result the same shape as `x`, or a sequence of
+    them computed in the same pass and returned as the
+    columns of an array of shape `(len(x), len(moments))`.
+
+    The variance and standard deviation divide by
+    `n - ddof`; the skewness and (excess) kurtosis are
+    the biased estimates, as from `scipy.stats.skew`
+    and `scipy.stats.kurtosis`.
+
+    The first `win - 1` rows are NaN. Windows holding
+    NaNs give NaN, unless `skipna` is True, in which
+    case the moments are of the other values.
+
+    >>> x = np.array([2., 4., 4., 4., 5., 5., 7., 9.])
+    >>> rolling_moments(x, 4, 'var')
+    array([   nan,    nan,    nan, 0.75  , 0.1875, 0.25  , 1.1875, 2.75  ])
+    >>> rolling_moments(x, 8, ['mean', 'std', 'kurt'])[-1]
+    array([ 5.   ,  2.   , -0.21875])
+    """
+    x = np.asarray(x, dtype=np.float64)
+    names = [moments] if isinstance(moments, str) else list(moments)
+    for name in names:
+        if name not in _MOMENTS:
+            raise ValueError('Unknown moment {!r}, expected one of {}'.format(name, _MOMENTS))
+    if x.ndim != 1:
+        raise ValueError('rolling_moments expects a 1-dimensional array')
+    if win < 1:
+        raise ValueError('The window must hold at least one value')
+
+    from fastats.core.precompile import jitted
+
+    codes = np.array([_MOMENTS.index(name) for name in names], dtype=np.int64)
+    out = np.empty((x.shape[0], codes.shape[0]))
+    if x.shape[0] >= win:
+        jitted(_rolling_moments)(x, int(win), codes, float(ddof), bool(skipna), out)
+    else:
+        out[:] = np.nan
+    return out[:, 0] if isinstance(moments, str) else out
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
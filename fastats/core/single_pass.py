@@ -1,7 +1,8 @@
 
-import numpy as np
+from numba import prange
 
 from fastats.core.decorator import fs
+from fastats.core.output import result_array
 
 
 def value(x):
@@ -9,11 +10,15 @@ def value(x):
 
 
 @fs
-def single_pass(x):
+def single_pass(x, out=None, dtype=None):
     """
     Performs a single iteration over the first
     dimension of `x`.
 
+    The results are written to `out` if it's given,
+    otherwise to a new array of type `dtype` (by
+    default the type of `x`).
+
     Tests
     -----
     >>> def square(x):
@@ -27,13 +32,48 @@ def single_pass(x):
     ...     return 2 * math.log(x)
     >>> single_pass(data[1:], value=calc)
     array([0, 1, 2, 2, 3, 3, 3, 4, 4])
+
+    Integer data gives integer results unless
+    another `dtype` is requested:
+
+    >>> single_pass(data[1:], value=calc, dtype=np.float64)[:3]
+    array([0.        , 1.38629436, 2.19722458])
+
+    >>> out = np.empty(9)
+    >>> result = single_pass(data[1:], out=out, value=calc)
+    >>> result is out
+    True
     """
-    result = np.zeros_like(x)
+    result = result_array(x, out, dtype)
     for i in range(x.shape[0]):
         result[i] = value(x[i])
     return result
 
 
+@fs(parallel=True)
+def single_pass_parallel(x, out=None, dtype=None):
+    """
+    The same as `single_pass`, but with the iterations
+    spread across threads, as they're independent.
+
+    Overrides, `out` and `dtype` work in the same way;
+    pass `num_threads` to limit the number of threads
+    used.
+
+    Tests
+    -----
+    >>> def square(x):
+    ...     return x * x
+    >>> data = np.arange(10)
+    >>> single_pass_parallel(data, value=square, num_threads=1)
+    array([ 0,  1,  4,  9, 16, 25, 36, 49, 64, 81])
+    """
+    result = result_array(x, out, dtype)
+    for i in prange(x.shape[0]):
+        result[i] = value(x[i])
+    return result
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
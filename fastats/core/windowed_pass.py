@@ -2,6 +2,7 @@
 import numpy as np
 
 from fastats.core.decorator import fs
+from fastats.core.output import nan_array
 
 
 def value(x):
@@ -9,7 +10,7 @@ def value(x):
 
 
 @fs
-def windowed_pass(x, win):
+def windowed_pass(x, win, out=None, dtype=None):
     """
     Performs a rolling (windowed) iteration
     over the first dimension of `x`.
@@ -22,6 +23,11 @@ def windowed_pass(x, win):
     The leading values will be nan up until
     the window size.
 
+    The results are written to `out` if it's given,
+    otherwise to a new array of type `dtype` (by
+    default the type of `x`). `out` must be a
+    floating point array, to hold the leading NaNs.
+
     Example
     -------
 
@@ -33,15 +39,23 @@ def windowed_pass(x, win):
     array([nan, nan, nan, nan, 2., 3.])
     >>> result[6:10]
     array([4., 5., 6., 7.])
+
+    >>> out = np.empty(10, dtype=np.float32)
+    >>> windowed_pass(x, 5, out=out, value=mean) is out
+    True
+    >>> out[3:6]
+    array([nan,  2.,  3.], dtype=float32)
     """
-    result = np.full_like(x, np.nan)
+    result = nan_array(x, out, dtype)
+    if out is not None:
+        result[:win-1] = np.nan
     for i in range(win, x.shape[0]+1):
         result[i-1] = value(x[i-win:i])
     return result
 
 
 @fs
-def windowed_pass_2d(x, win):
+def windowed_pass_2d(x, win, out=None, dtype=None):
     """
     The same as windowed pass, but explicitly
     iterates over the `value()` return array
@@ -54,8 +68,13 @@ def windowed_pass_2d(x, win):
     This allows for extremely fast iteration
     for items such as OLS, and at the same time
     calculating t-stats / r^2.
+
+    `out` and `dtype` are the same as for
+    `windowed_pass`.
     """
-    result = np.full_like(x, np.nan)
+    result = nan_array(x, out, dtype)
+    if out is not None:
+        result[:] = np.nan
     for i in range(win, x.shape[0]+1):
         res = value(x[i-win:i])
         for j, j_val in enumerate(res):
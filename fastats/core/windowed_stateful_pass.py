@@ -1,13 +1,19 @@
 
 import numpy as np
+from numba import prange
 
 from fastats.core.decorator import fs
+from fastats.core.output import nan_array
 
 
 def value(x, val_in, val_out, state):  # pragma: no cover
     return val_in, state
 
 
+def initial_state(x, win):
+    return np.empty(0, dtype=x.dtype)
+
+
 @fs
 def windowed_stateful_pass(x, win):
     """
@@ -42,6 +48,17 @@ def windowed_stateful_pass(x, win):
     iterations can modify the array, but their
     state return value will be ignored.
 
+    Alternatively, pass an ``initial_state(x, win)``
+    function to create the state once, before the
+    first iteration. This can return any mutable
+    value numba supports, such as a record array or
+    a tuple of arrays of different types, so
+    counters and indices don't need to be stored as
+    floats. The ``value`` function must then return
+    the state it was given. Index the fields of a
+    record (``record['count']``) rather than using
+    attributes, which only numba supports.
+
     Example
     -------
     >>> def rolling_sum(x, val_in, val_out, state):
@@ -54,9 +71,27 @@ def windowed_stateful_pass(x, win):
     >>> result = windowed_stateful_pass(x, 4, value=rolling_sum)
     >>> result
     array([nan, nan, nan, 6., 10., 14., 18.])
+
+    The same, keeping an integer count of the
+    values added in a record:
+
+    >>> counter = np.dtype([('total', np.float64), ('count', np.int64)])
+    >>> def sum_state(x, win):
+    ...     return np.zeros(1, dtype=counter)
+    >>> def counted_sum(x, val_in, val_out, state):
+    ...     record = state[0]
+    ...     if record['count'] == 0:
+    ...         record['total'] = np.sum(x)
+    ...         record['count'] = x.size
+    ...     else:
+    ...         record['total'] += val_in - val_out
+    ...         record['count'] += 1
+    ...     return record['total'], state
+    >>> windowed_stateful_pass(x, 4, value=counted_sum, initial_state=sum_state)
+    array([nan, nan, nan, 6., 10., 14., 18.])
     """
     result = np.full_like(x, np.nan)
-    state = np.empty(0, dtype=result.dtype)
+    state = initial_state(x, win)
 
     val_in = x[win-1]
     val_out = np.nan
@@ -77,6 +112,62 @@ def windowed_stateful_pass(x, win):
     return result
 
 
+@fs(parallel=True)
+def windowed_stateful_pass_parallel(x, win, out=None, dtype=None):
+    """
+    The same as `windowed_stateful_pass`, for each
+    column of the 2-dimensional array `x`, with the
+    columns spread across threads.
+
+    Each column has its own state, from
+    ``initial_state`` or the first call to the
+    ``value`` function for that column, and the
+    result for step `i` of column `j` is written to
+    `result[i, j]`. The columns are passed to
+    ``value`` as views, so `x` is best in Fortran
+    (column-major) order. A ValueError is raised
+    unless `1 <= win <= x.shape[0]`.
+
+    The results are written to `out` if it's given,
+    otherwise to a new array of type `dtype` (by
+    default the type of `x`); pass `num_threads` to
+    limit the number of threads used.
+
+    Example
+    -------
+    >>> def rolling_sum(x, val_in, val_out, state):
+    ...     if state.size == 0:
+    ...         state = np.array([np.sum(x)], dtype=x.dtype)
+    ...     else:
+    ...         state[0] += val_in - val_out
+    ...     return state[0], state
+    >>> x = np.arange(10, dtype='float').reshape(5, 2)
+    >>> windowed_stateful_pass_parallel(x, 3, value=rolling_sum)
+    array([[nan, nan],
+           [nan, nan],
+           [ 6.,  9.],
+           [12., 15.],
+           [18., 21.]])
+    """
+    if win < 1 or win > x.shape[0]:
+        raise ValueError('The window must hold between 1 and len(x) values')
+
+    result = nan_array(x, out, dtype)
+    if out is not None:
+        result[:win-1] = np.nan
+
+    for j in prange(x.shape[1]):
+        column = x[:, j]
+        state = initial_state(column, win)
+        result[win-1, j], state = value(column[0:win], column[win-1], np.nan, state)
+
+        for i in range(win+1, x.shape[0]+1):
+            start = i - win
+            result[i-1, j], _ = value(column[start:i], column[i-1], column[start-1], state)
+
+    return result
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
@@ -0,0 +1,106 @@
+"""
+numba compiled (nopython) versions of the fastats maths,
+scaling and linear algebra functions.
+
+    from fastats.jit import ewma
+
+Each function is compiled on first access, along with
+any functions it calls, and the compiled code is
+persisted to the fastats cache directory (see
+`fastats.core.disk_cache`), falling back to
+`~/.cache/fastats`, so later processes only pay for
+loading it.
+
+The pure python originals in `fastats.maths`,
+`fastats.scaling` and `fastats.linear_algebra` are
+left untouched for debugging. The `_parallel` scalers
+are compiled with `parallel=True`.
+
+The scipy based OLS solvers (`ols_qr`, `ols_cholesky`
+and `ols_svd`) can't be compiled by numba so aren't
+available here.
+"""
+
+from importlib import import_module
+
+
+_FUNCTIONS = {
+    'relu': 'fastats.maths.activations',
+    'softplus': 'fastats.maths.activations',
+    'beta_pdf': 'fastats.maths.beta_pdf',
+    'deriv': 'fastats.maths.deriv',
+    'erf': 'fastats.maths.erf',
+    'erfc': 'fastats.maths.erfc',
+    'ewma': 'fastats.maths.ewma',
+    'ewma_2d': 'fastats.maths.ewma',
+    'gammaln': 'fastats.maths.gamma',
+    'logistic': 'fastats.maths.logistic',
+    'norm_cdf': 'fastats.maths.norm_cdf',
+    'norm_pdf': 'fastats.maths.norm_pdf',
+    'sum_sq_dev': 'fastats.maths.sum_sq_dev',
+    't_pdf': 'fastats.maths.t_pdf',
+    'pearson': 'fastats.maths.correlation.pearson',
+    'pearson_pairwise': 'fastats.maths.correlation.pearson',
+    'spearman': 'fastats.maths.correlation.spearman',
+    'spearman_pairwise': 'fastats.maths.correlation.spearman',
+    'scale': 'fastats.scaling.scaling',
+    'standard': 'fastats.scaling.scaling',
+    'standard_parallel': 'fastats.scaling.scaling',
+    'min_max': 'fastats.scaling.scaling',
+    'min_max_parallel': 'fastats.scaling.scaling',
+    'rank': 'fastats.scaling.scaling',
+    'demean': 'fastats.scaling.scaling',
+    'demean_parallel': 'fastats.scaling.scaling',
+    'shrink_off_diagonals': 'fastats.scaling.scaling',
+    'lu': 'fastats.linear_algebra.lu',
+    'lu_inplace': 'fastats.linear_algebra.lu',
+    'lu_compact': 'fastats.linear_algebra.lu',
+    'ols': 'fastats.linear_algebra.ols',
+    'add_intercept': 'fastats.linear_algebra.ols',
+    'drop_missing': 'fastats.linear_algebra.ols',
+    'r_squared': 'fastats.linear_algebra.ols',
+    'r_squared_no_intercept': 'fastats.linear_algebra.ols',
+    'sum_of_squared_residuals': 'fastats.linear_algebra.ols',
+    'fitted_values': 'fastats.linear_algebra.ols',
+    'residuals': 'fastats.linear_algebra.ols',
+    'adjusted_r_squared': 'fastats.linear_algebra.ols',
+    'adjusted_r_squared_no_intercept': 'fastats.linear_algebra.ols',
+    'standard_error': 'fastats.linear_algebra.ols',
+    'mean_standard_error_residuals': 'fastats.linear_algebra.ols',
+    't_statistic': 'fastats.linear_algebra.ols',
+    'f_statistic': 'fastats.linear_algebra.ols',
+    'f_statistic_no_intercept': 'fastats.linear_algebra.ols',
+    'pca': 'fastats.linear_algebra.pca',
+    'inv': 'fastats.linear_algebra.inv',
+    'det': 'fastats.linear_algebra.det',
+    'matrix_minor': 'fastats.linear_algebra.matrix_minor',
+    'qr': 'fastats.linear_algebra.qr',
+    'qr_classical_gram_schmidt': 'fastats.linear_algebra.qr',
+    'lasso_orthonormal': 'fastats.linear_algebra.lasso',
+}
+
+_PARALLEL = {'standard_parallel', 'min_max_parallel', 'demean_parallel'}
+
+__all__ = sorted(_FUNCTIONS)
+
+
+def __getattr__(name):
+    try:
+        module_name = _FUNCTIONS[name]
+    except KeyError:
+        raise AttributeError(
+            'module {!r} has no attribute {!r}'.format(__name__, name)
+        ) from None
+
+    from fastats.core import disk_cache
+    from fastats.core.precompile import jitted
+
+    original = getattr(import_module(module_name), name)
+    options = {'parallel': True} if name in _PARALLEL else {}
+    compiled = jitted(original, cache_dir=disk_cache.jit_cache_dir(), **options)
+    globals()[name] = compiled
+    return compiled
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,520 @@
+"""
+Lazy evaluation of fastats computations.
+
+    from fastats import lazy
+
+    x = lazy.array(data)
+    z = lazy.standard(x)
+    features = lazy.compute(z * z, np.log1p(np.abs(z)))
+
+Operations on expressions (arithmetic, comparisons,
+numpy ufuncs, `apply` and the fastats functions below)
+build a graph instead of computing arrays. `compute` then
+evaluates the graph:
+
+- Identical sub-expressions are evaluated once
+  (common sub-expression elimination).
+- Chains of element-wise operations are fused into
+  a single generated `@fs` kernel, so intermediate
+  results stay in registers instead of being
+  written to temporary arrays. Kernels are cached
+  by their structure, so the same expression built
+  for many columns is only compiled once.
+- Other operations (`demean`, `standard`,
+  `min_max`, `ewma`, `windowed_pass` and anything
+  passed to `call`) run on the arrays they need,
+  which are the only intermediate results
+  materialised.
+
+Like `fastats.jit`, numba is only imported once an
+expression is computed.
+"""
+
+from threading import Lock
+
+import numpy as np
+
+
+_KERNELS = {}
+_KERNELS_LOCK = Lock()
+
+_ELEMENTWISE = ('ufunc', 'apply')
+
+
+class Expr:
+    """
+    A node of a lazy expression graph; see the
+    functions of `fastats.lazy` for building them.
+
+    Comparisons build element-wise expressions as
+    they do for arrays, so nodes are hashed (and
+    told apart in the graph) by identity, and an
+    expression can't be used as a truth value.
+
+    >>> x = array(np.arange(4.0))
+    >>> (x > 1).compute()
+    array([False, False,  True,  True])
+    >>> (x == 2).compute()
+    array([False, False,  True, False])
+    """
+    __hash__ = object.__hash__
+
+    def __init__(self, kind, inputs=(), params=()):
+        self.kind = kind
+        self.inputs = tuple(inputs)
+        self.params = tuple(params)
+
+    def compute(self):
+        """
+        Evaluates this expression, returning an array.
+        """
+        return compute(self)[0]
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs or ufunc.nout != 1:
+            return NotImplemented
+        return _ufunc(ufunc, *inputs)
+
+    def __repr__(self):
+        if self.kind == 'ufunc':
+            label = self.params[0].__name__
+        elif self.kind in ('apply', 'call'):
+            label = getattr(self.params[0], '__name__', self.params[0])
+        else:
+            label = self.kind
+        return '<lazy {}>'.format(label)
+
+    def __bool__(self):
+        raise TypeError('The truth value of a lazy expression is ambiguous; compute it first')
+
+    def __neg__(self):
+        return _ufunc(np.negative, self)
+
+    def __abs__(self):
+        return _ufunc(np.absolute, self)
+
+
+def _binary(ufunc):
+    def forward(self, other):
+        return _ufunc(ufunc, self, other)
+
+    def reverse(self, other):
+        return _ufunc(ufunc, other, self)
+
+    return forward, reverse
+
+
+Expr.__add__, Expr.__radd__ = _binary(np.add)
+Expr.__sub__, Expr.__rsub__ = _binary(np.subtract)
+Expr.__mul__, Expr.__rmul__ = _binary(np.multiply)
+Expr.__truediv__, Expr.__rtruediv__ = _binary(np.true_divide)
+Expr.__pow__, Expr.__rpow__ = _binary(np.power)
+
+
+def _comparison(ufunc):
+    # Python tries the reflected comparison itself (`0 < x`
+    # calls `x > 0`), and falls back to identity for `==`
+    # and `!=` with values which can't be in an expression.
+    def compare(self, other):
+        try:
+            return _ufunc(ufunc, self, other)
+        except TypeError:
+            return NotImplemented
+
+    return compare
+
+
+Expr.__eq__ = _comparison(np.equal)
+Expr.__ne__ = _comparison(np.not_equal)
+Expr.__lt__ = _comparison(np.less)
+Expr.__le__ = _comparison(np.less_equal)
+Expr.__gt__ = _comparison(np.greater)
+Expr.__ge__ = _comparison(np.greater_equal)
+
+
+def array(x):
+    """
+    Wraps the array `x` as an expression.
+
+    >>> x = array(np.arange(3.0))
+    >>> (x * 2 + 1).compute()
+    array([1., 3., 5.])
+    """
+    return Expr('array', params=(np.asarray(x),))
+
+
+def _wrap(value):
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, np.ndarray) and value.ndim > 0:
+        return array(value)
+    if np.ndim(value) == 0 and np.asarray(value).dtype.kind in 'biufc':
+        return Expr('constant', params=(np.asarray(value).item(),))
+    raise TypeError('Unsupported type for a lazy expression: {!r}'.format(type(value)))
+
+
+def _ufunc(ufunc, *inputs):
+    if getattr(np, ufunc.__name__, None) is not ufunc:
+        raise TypeError('Only numpy ufuncs can be applied to lazy expressions')
+    return Expr('ufunc', [_wrap(i) for i in inputs], (ufunc,))
+
+
+def apply(func, *inputs, dtype=np.float64):
+    """
+    Applies the scalar function `func` element-wise
+    to the (broadcast) `inputs`, with the result of
+    type `dtype`.
+
+    `func` is substituted into the generated kernel
+    as an `@fs` override, so it's compiled along with
+    the functions it calls:
+
+    >>> from fastats.maths import norm_pdf
+    >>> x = array(np.array([-1.0, 0.0, 1.0]))
+    >>> apply(norm_pdf, x, 0.0, 1.0).compute()
+    array([0.24197072, 0.39894228, 0.24197072])
+    """
+    return Expr('apply', [_wrap(i) for i in inputs], (func, np.dtype(dtype)))
+
+
+def call(func, x, *args, **kwargs):
+    """
+    An expression for `func(x, *args, **kwargs)`,
+    where `x` is the computed value of the expression
+    (or array) `x`. `func` may also be the name of a
+    function in `fastats.jit`.
+
+    The call itself isn't fused with anything else,
+    but identical calls are only made once.
+    """
+    return Expr('call', [_wrap(x)], (func, args, tuple(sorted(kwargs.items()))))
+
+
+def demean(A):
+    """
+    Lazy version of `fastats.scaling.demean`.
+    """
+    return call('demean', A)
+
+
+def standard(A, ddof=0):
+    """
+    Lazy version of `fastats.scaling.standard`.
+    """
+    return call('standard', A, ddof)
+
+
+def min_max(A):
+    """
+    Lazy version of `fastats.scaling.min_max`.
+    """
+    return call('min_max', A)
+
+
+def _ewma(x, halflife):
+    import fastats.jit
+
+    if x.ndim == 2:
+        return fastats.jit.ewma_2d(x, halflife)
+    return fastats.jit.ewma(x, halflife)
+
+
+def ewma(x, halflife):
+    """
+    Lazy version of `fastats.maths.ewma`, which
+    uses `ewma_2d` for 2-dimensional data.
+    """
+    return call(_ewma, x, halflife)
+
+
+def _windowed_pass(x, win, **overrides):
+    from fastats.core.windowed_pass import windowed_pass
+
+    return windowed_pass(x, win, **overrides)
+
+
+def windowed_pass(x, win, **overrides):
+    """
+    Lazy version of `fastats.windowed_pass`.
+    """
+    return call(_windowed_pass, x, win, **overrides)
+
+
+def compute(*exprs, jit_options=None):
+    """
+    Evaluates the expressions `exprs` together,
+    returning a tuple of arrays. `jit_options` are
+    passed to numba for the generated kernels, for
+    example `{'fastmath': True}`.
+
+    Work shared between the expressions is only done
+    once, and element-wise operations are evaluated
+    in as few passes over the data as possible:
+
+    >>> x = array(np.arange(4.0))
+    >>> y = np.sqrt(x + 1)
+    >>> compute(y * 2, y - 1)
+    (array([2.        , 2.82842712, 3.46410162, 4.        ]), array([0.        , 0.41421356, 0.73205081, 1.        ]))
+    """
+    roots = [_wrap(e) for e in exprs]
+    order, canonical = _eliminate_common(roots)
+    roots = [canonical[r] for r in roots]
+
+    levels = {}
+    materialise = set(roots)
+    for node in order:
+        below = [levels[i] for i in node.inputs]
+        if node.kind == 'call':
+            levels[node] = max(below) + 1
+            materialise.update(node.inputs)
+        else:
+            levels[node] = max(below, default=0)
+
+    results = {node: node.params[0] for node in order if node.kind == 'array'}
+    for level in range(max(levels.values()) + 1):
+        for node in order:
+            if node.kind == 'call' and levels[node] == level:
+                results[node] = _call(node, results)
+
+        pending = [
+            node for node in order
+            if node.kind in _ELEMENTWISE and node in materialise and levels[node] == level
+        ]
+        for group in _kernel_groups(pending, results):
+            _evaluate(group, results, jit_options)
+
+    return tuple(
+        np.asarray(r.params[0]) if r.kind == 'constant' else results[r]
+        for r in roots
+    )
+
+
+def _postorder(roots):
+    seen = set()
+    order = []
+    stack = [(r, False) for r in reversed(roots)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+        elif node not in seen:
+            seen.add(node)
+            stack.append((node, True))
+            stack.extend((i, False) for i in reversed(node.inputs))
+    return order
+
+
+def _key(node, canonical):
+    inputs = tuple(id(canonical[i]) for i in node.inputs)
+    if node.kind == 'array':
+        params = id(node.params[0])
+    elif node.kind == 'constant':
+        params = (type(node.params[0]), node.params[0])
+    else:
+        params = node.params
+    key = (node.kind, params, inputs)
+    try:
+        hash(key)
+    except TypeError:
+        # For example a call with an array argument.
+        return id(node)
+    return key
+
+
+def _eliminate_common(roots):
+    """
+    Maps every node of the graph to a single
+    (canonical) node per distinct sub-expression,
+    returning the canonical nodes in dependency
+    order along with the mapping.
+
+    The canonical nodes have their inputs replaced by
+    canonical nodes, so the rest of `compute` only
+    sees the de-duplicated graph.
+    """
+    canonical = {}
+    by_key = {}
+    order = []
+    for node in _postorder(roots):
+        key = _key(node, canonical)
+        if key not in by_key:
+            by_key[key] = Expr(node.kind, [canonical[i] for i in node.inputs], node.params)
+            order.append(by_key[key])
+        canonical[node] = by_key[key]
+    return order, canonical
+
+
+def _value(node, results):
+    if node.kind == 'constant':
+        return node.params[0]
+    return results[node]
+
+
+def _call(node, results):
+    func, args, kwargs = node.params
+    if isinstance(func, str):
+        import fastats.jit
+        func = getattr(fastats.jit, func)
+    return func(_value(node.inputs[0], results), *args, **dict(kwargs))
+
+
+def _shape(node, results, cache):
+    if node in results:
+        return np.shape(results[node])
+    if node.kind == 'constant':
+        return ()
+    if node not in cache:
+        cache[node] = np.broadcast_shapes(*[_shape(i, results, cache) for i in node.inputs])
+    return cache[node]
+
+
+def _dtype(node, results, cache):
+    if node in results:
+        return np.asarray(results[node]).dtype
+    if node.kind == 'apply':
+        return node.params[1]
+    if node not in cache:
+        samples = [
+            i.params[0] if i.kind == 'constant' else np.empty(0, _dtype(i, results, cache))
+            for i in node.inputs
+        ]
+        with np.errstate(all='ignore'):
+            cache[node] = np.asarray(node.params[0](*samples)).dtype
+    return cache[node]
+
+
+def _body(outputs, results):
+    """
+    The element-wise nodes needed to evaluate
+    `outputs` which haven't been computed yet,
+    in dependency order.
+    """
+    nodes = []
+    for node in _postorder(outputs):
+        if node.kind in _ELEMENTWISE and node not in results:
+            nodes.append(node)
+    return nodes
+
+
+def _kernel_groups(pending, results):
+    """
+    Splits the element-wise nodes to be computed into
+    groups evaluated by one kernel each: nodes of the
+    same shape which share any intermediate results.
+
+    Unrelated expressions (such as the same expression
+    for each of many columns) get a kernel each, so
+    they share the compiled code rather than one very
+    large kernel being compiled.
+    """
+    shapes = {}
+    groups = []
+    owner = {}
+    for node in pending:
+        shape = _shape(node, results, shapes)
+        body = set(_body([node], results))
+        joined = [g for g in {id(owner[n]): owner[n] for n in body if n in owner}.values()
+                  if g['shape'] == shape]
+        group = {'shape': shape, 'outputs': [node], 'body': body}
+        for other in joined:
+            group['outputs'] = other['outputs'] + group['outputs']
+            group['body'] |= other['body']
+        # Groups are told apart by identity, as comparing
+        # them would compare expressions element-wise.
+        groups = [g for g in groups if not any(g is other for other in joined)]
+        groups.append(group)
+        for n in group['body']:
+            owner[n] = group
+    return [g['outputs'] for g in groups]
+
+
+def _literal(value):
+    if isinstance(value, float) and not np.isfinite(value):
+        return {'nan': 'np.nan', 'inf': 'np.inf', '-inf': '-np.inf'}[repr(value)]
+    return repr(value)
+
+
+def _evaluate(outputs, results, jit_options):
+    shapes, dtypes = {}, {}
+    shape = _shape(outputs[0], results, shapes)
+
+    # The inputs are passed as broadcast views, so those which
+    # are broadcast or not contiguous are never copied. If they're
+    # all contiguous the kernel is a single flat loop, otherwise
+    # it loops over (and indexes) every dimension of the result.
+    body = _body(outputs, results)
+    views = {}
+    for node in body:
+        for i in node.inputs:
+            if i.kind != 'constant' and i in results and i not in views:
+                views[i] = np.broadcast_to(results[i], shape)
+    if all(v.flags.c_contiguous for v in views.values()):
+        loop_shape = (int(np.prod(shape)),)
+    else:
+        loop_shape = shape
+    index = ', '.join('i{}'.format(d) for d in range(len(loop_shape)))
+    indent = '    ' * (len(loop_shape) + 1)
+
+    names = {}
+    arrays = []
+    overrides = {}
+    lines = []
+    for j, node in enumerate(body):
+        args = []
+        for i in node.inputs:
+            if i not in names:
+                if i.kind == 'constant':
+                    # Constants are part of the source, so numba
+                    # can specialise on them (e.g. `x ** 2`).
+                    names[i] = _literal(i.params[0])
+                else:
+                    names[i] = 'a_{}'.format(len(arrays))
+                    arrays.append(views[i].reshape(loop_shape))
+                    lines.append('{}{} = in_{}[{}]'.format(indent, names[i], len(arrays) - 1, index))
+            args.append(names[i])
+
+        names[node] = 't_{}'.format(j)
+        if node.kind == 'ufunc':
+            func = 'np.{}'.format(node.params[0].__name__)
+        else:
+            func = 'func_{}'.format(len(overrides))
+            overrides[func] = node.params[0]
+        lines.append('{}{} = {}({})'.format(indent, names[node], func, ', '.join(args)))
+
+    out = [np.empty(loop_shape, _dtype(node, results, dtypes)) for node in outputs]
+    lines += ['{}out_{}[{}] = {}'.format(indent, j, index, names[node]) for j, node in enumerate(outputs)]
+
+    params = (
+        ['in_{}'.format(j) for j in range(len(arrays))]
+        + ['out_{}'.format(j) for j in range(len(outputs))]
+    )
+    loops = [
+        '{}for i{} in range(out_0.shape[{}]):'.format('    ' * (d + 1), d, d)
+        for d in range(len(loop_shape))
+    ]
+    source = '\n'.join(['def lazy_kernel({}):'.format(', '.join(params))] + loops + lines) + '\n'
+
+    compiled = _kernel(source, len(overrides)).specialise(jit_options=jit_options, **overrides)
+    compiled(*arrays, *out)
+    results.update((node, o.reshape(shape)) for node, o in zip(outputs, out))
+
+
+def _apply_stub(*args):  # pragma: no cover
+    return args[0]
+
+
+def _kernel(source, num_funcs):
+    from fastats.core.codegen import define
+    from fastats.core.decorator import fs
+
+    with _KERNELS_LOCK:
+        if source not in _KERNELS:
+            namespace = {'np': np, '__name__': __name__}
+            namespace.update(('func_{}'.format(j), _apply_stub) for j in range(num_funcs))
+            _KERNELS[source] = fs(define(source, 'lazy_kernel', namespace))
+        return _KERNELS[source]
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -1,20 +1,5 @@
 
-from fastats.linear_algebra.det import det
-from fastats.linear_algebra.inv import inv
-from fastats.linear_algebra.lasso import lasso_orthonormal
-from fastats.linear_algebra.lu import lu, lu_inplace, lu_compact
-from fastats.linear_algebra.matrix_minor import matrix_minor
-from fastats.linear_algebra.ols import (
-    ols, ols_cholesky, ols_qr, ols_svd, r_squared,
-    sum_of_squared_residuals, fitted_values, residuals,
-    adjusted_r_squared, standard_error, t_statistic,
-    mean_standard_error_residuals, add_intercept,
-    adjusted_r_squared_no_intercept, r_squared_no_intercept,
-    f_statistic, f_statistic_no_intercept,
-    drop_missing
-)
-from fastats.linear_algebra.pca import pca
-from fastats.linear_algebra.qr import qr, qr_classical_gram_schmidt
+from fastats.utilities.lazy import lazy_package
 
 __all__ = [
     'lu',
@@ -46,3 +31,37 @@ __all__ = [
     'lasso_orthonormal',
     'drop_missing',
 ]
+
+
+# Imported on first access; several of these modules
+# import numba or scipy.
+lazy_package(__name__, {
+    'lu': 'fastats.linear_algebra.lu',
+    'lu_inplace': 'fastats.linear_algebra.lu',
+    'lu_compact': 'fastats.linear_algebra.lu',
+    'ols': 'fastats.linear_algebra.ols',
+    'ols_cholesky': 'fastats.linear_algebra.ols',
+    'ols_qr': 'fastats.linear_algebra.ols',
+    'ols_svd': 'fastats.linear_algebra.ols',
+    'pca': 'fastats.linear_algebra.pca',
+    'add_intercept': 'fastats.linear_algebra.ols',
+    'r_squared': 'fastats.linear_algebra.ols',
+    'r_squared_no_intercept': 'fastats.linear_algebra.ols',
+    'sum_of_squared_residuals': 'fastats.linear_algebra.ols',
+    'fitted_values': 'fastats.linear_algebra.ols',
+    'residuals': 'fastats.linear_algebra.ols',
+    'adjusted_r_squared': 'fastats.linear_algebra.ols',
+    'adjusted_r_squared_no_intercept': 'fastats.linear_algebra.ols',
+    'standard_error': 'fastats.linear_algebra.ols',
+    'mean_standard_error_residuals': 'fastats.linear_algebra.ols',
+    't_statistic': 'fastats.linear_algebra.ols',
+    'f_statistic': 'fastats.linear_algebra.ols',
+    'f_statistic_no_intercept': 'fastats.linear_algebra.ols',
+    'inv': 'fastats.linear_algebra.inv',
+    'matrix_minor': 'fastats.linear_algebra.matrix_minor',
+    'det': 'fastats.linear_algebra.det',
+    'qr': 'fastats.linear_algebra.qr',
+    'qr_classical_gram_schmidt': 'fastats.linear_algebra.qr',
+    'lasso_orthonormal': 'fastats.linear_algebra.lasso',
+    'drop_missing': 'fastats.linear_algebra.ols',
+})
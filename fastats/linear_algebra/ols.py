@@ -2,7 +2,6 @@
 import numpy as np
 from numpy import diag, sqrt, hstack, ones, eye
 from numpy.linalg import inv
-from scipy.linalg import qr, solve_triangular, cholesky, svd
 
 
 def ols(A, b):
@@ -30,6 +29,8 @@ def ols_qr(A, b):
     to OLS; Ax = b, A = QR, QRx = b,
     therefore Rx = Q.T * b
     """
+    from scipy.linalg import qr, solve_triangular
+
     Q, R = qr(A, mode='economic')
     return solve_triangular(R, Q.T @ b)
 
@@ -49,6 +50,8 @@ def ols_cholesky(A, b):
 
     Find R using Cholesky decomposition.
     """
+    from scipy.linalg import cholesky, solve_triangular
+
     R = cholesky(A.T @ A)
     w = solve_triangular(R, A.T @ b, trans='T')
     return solve_triangular(R, w)
@@ -65,6 +68,8 @@ def ols_svd(A, b):
     Σ @ w = U.T @ b
     x = Vh.T @ w
     """
+    from scipy.linalg import svd
+
     U, sigma, Vh = svd(A, full_matrices=False)
     w = (U.T @ b) / sigma
     return Vh.T @ w
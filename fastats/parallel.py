@@ -0,0 +1,354 @@
+"""
+Runs compiled fastats functions over many independent
+inputs at once, using a pool of threads (`map` and
+`map_columns`) or of processes (`process_map`).
+
+    from fastats import parallel
+    from fastats.maths import ewma
+
+    smoothed = parallel.map_columns(ewma, prices, 10.0)
+
+fastats compiles functions with `nogil=True`, so
+calls to them from different threads run on separate
+cores at the same time. This gives multi-core
+throughput for serial kernels (such as `ewma` or
+`windowed_stateful_pass`) applied to thousands of
+independent series, without any copying or pickling
+of the data.
+
+Functions with `parallel=True` already use numba's
+threads, so running them here oversubscribes the
+cores; limit them with `num_threads` if combining
+the two.
+
+`process_map` is for work which doesn't release the
+GIL, or which the threads of a single process can't
+scale to. Its input and output arrays are placed in
+shared memory (see `SharedArray`), so the worker
+processes read and write them without copying.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from inspect import signature
+
+import numpy as np
+
+
+def compiled(func, kwargs):
+    """
+    The compiled function to call for `func`, along
+    with the keyword arguments to call it with.
+
+    `@fs` functions are specialised with the
+    overrides in `kwargs`, leaving the arguments
+    naming parameters of the function; numba
+    dispatchers are used as they are, and plain
+    python functions are compiled with
+    `fastats.core.precompile.jitted`.
+
+    This happens once, before any work is handed to
+    the threads.
+    """
+    from numba.core.registry import CPUDispatcher
+    from numba.np.ufunc.dufunc import DUFunc
+
+    if hasattr(func, 'specialise'):
+        params = signature(func.undecorated).parameters
+        call_kwargs = {k: v for k, v in kwargs.items() if k in params}
+        overrides = {k: v for k, v in kwargs.items() if k not in params}
+        return func.specialise(**overrides), call_kwargs
+    if isinstance(func, (CPUDispatcher, DUFunc, np.ufunc)):
+        return func, kwargs
+
+    from fastats.core.precompile import jitted
+    return jitted(func), kwargs
+
+
+def _workers(workers):
+    return workers or os.cpu_count() or 1
+
+
+def _batches(n, workers, chunksize):
+    """
+    Splits `range(n)` into consecutive ranges of
+    `chunksize` items, by default about four per
+    worker to balance the load.
+    """
+    if chunksize is None:
+        chunksize = max(1, -(-n // (4 * workers)))
+    return [range(i, min(i + chunksize, n)) for i in range(0, n, chunksize)]
+
+
+def map(func, chunks, *args, workers=None, chunksize=None, **kwargs):
+    """
+    Returns `[func(chunk, *args, **kwargs) for chunk in chunks]`,
+    with the calls made from a pool of `workers`
+    threads (by default one per CPU).
+
+    Keyword arguments which aren't parameters of an
+    `@fs` function are overrides, as when calling it.
+    The chunks are passed as they are, so views of a
+    larger array are never copied. Consecutive chunks
+    are handed to the threads in batches of
+    `chunksize`.
+
+    >>> from fastats.maths import ewma
+    >>> series = [np.arange(5.0), np.ones(3)]
+    >>> map(ewma, series, 2.0, workers=2)
+    [array([0.        , 0.58578644, 1.22654092, 1.91911977, 2.65947261]), array([1., 1., 1.])]
+    """
+    chunks = list(chunks)
+    kernel, kwargs = compiled(func, kwargs)
+
+    def run(batch):
+        return [kernel(chunks[i], *args, **kwargs) for i in batch]
+
+    workers = _workers(workers)
+    with ThreadPoolExecutor(workers, thread_name_prefix='fastats-parallel') as executor:
+        batches = executor.map(run, _batches(len(chunks), workers, chunksize))
+        return [result for batch in batches for result in batch]
+
+
+def map_columns(func, A, *args, workers=None, chunksize=None, out=None, **kwargs):
+    """
+    Calls `func(A[:, j], *args, **kwargs)` for every
+    column `j` of the 2-dimensional array `A`, using
+    a pool of `workers` threads (see `map`).
+
+    The results are written into column `j` of `out`
+    (so for array results `out[:, j]`, and for
+    scalar results `out[j]`), which is allocated from
+    the type and shape of the first result if it
+    isn't given. Passes with an `out` parameter write
+    their results into it directly.
+
+    The columns are passed as views of `A`; kernels
+    iterating down a column are fastest if `A` is
+    in Fortran (column-major) order.
+
+    >>> from fastats import windowed_pass
+    >>> def total(x):
+    ...     return np.sum(x)
+    >>> A = np.arange(8.0).reshape(4, 2)
+    >>> map_columns(windowed_pass, A, 2, value=total, workers=2)
+    array([[nan, nan],
+           [ 2.,  4.],
+           [ 6.,  8.],
+           [10., 12.]])
+    """
+    A = np.asarray(A)
+    if A.ndim != 2:
+        raise ValueError('map_columns expects a 2-dimensional array')
+
+    n = A.shape[1]
+    kernel, kwargs = compiled(func, kwargs)
+    if n == 0:
+        return out if out is not None else np.empty((0,), A.dtype)
+
+    # Passes accepting `out=` (such as `windowed_pass`)
+    # write straight into the columns of the result.
+    direct = (
+        hasattr(func, 'undecorated') and 'out' in signature(func.undecorated).parameters
+        and 'out' not in kwargs
+    )
+
+    def run(batch):
+        for j in batch:
+            if direct:
+                kernel(A[:, j], *args, out=out[:, j], **kwargs)
+            else:
+                out[..., j] = kernel(A[:, j], *args, **kwargs)
+
+    # The first column is computed up-front, both to size
+    # the output and so any compilation happens here rather
+    # than in every thread at once.
+    if direct and out is None:
+        out = np.empty(A.shape, kwargs.get('dtype') or A.dtype, order='F')
+    if out is None:
+        first = kernel(A[:, 0], *args, **kwargs)
+        out = np.empty(np.shape(first) + (n,), np.asarray(first).dtype)
+        out[..., 0] = first
+    else:
+        run([0])
+
+    workers = _workers(workers)
+    batches = _batches(n - 1, workers, chunksize)
+    with ThreadPoolExecutor(workers, thread_name_prefix='fastats-parallel') as executor:
+        futures = [executor.submit(run, range(b.start + 1, b.stop + 1)) for b in batches]
+        for future in futures:
+            future.result()
+    return out
+
+
+class SharedArray:
+    """
+    A numpy array (`array`) backed by shared memory.
+
+    Pickling a `SharedArray` only sends the name of its
+    memory block, so unpickling it in another process
+    (such as a `process_map` worker) attaches to the
+    same data instead of copying it.
+
+    The process creating the array owns the memory,
+    which is freed by `close()` (or on leaving a
+    `with` block); other processes only detach from
+    it. No views of `array` may be in use by then.
+
+    >>> with SharedArray((2, 3)) as shared:
+    ...     shared.array[:] = 1.0
+    ...     shared.array.sum()
+    6.0
+    """
+    def __init__(self, shape, dtype=np.float64, name=None):
+        from multiprocessing.shared_memory import SharedMemory
+
+        dtype = np.dtype(dtype)
+        self._owner = name is None
+        if self._owner:
+            size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+            self._shm = SharedMemory(create=True, size=size)
+        else:
+            self._shm = SharedMemory(name=name)
+        self.array = np.ndarray(shape, dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def copy(cls, a):
+        """
+        A `SharedArray` holding a copy of the array `a`.
+        """
+        a = np.asarray(a)
+        shared = cls(a.shape, a.dtype)
+        shared.array[...] = a
+        return shared
+
+    def close(self):
+        self.array = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        return SharedArray, (self.array.shape, self.array.dtype.str, self._shm.name)
+
+
+def _block(a, axis, index):
+    return a[index] if axis == 0 else a[..., index]
+
+
+def _run_block(func, source, out, axis, index, args, kwargs):  # pragma: no cover
+    # Runs in the worker processes.
+    args = [a.array if isinstance(a, SharedArray) else a for a in args]
+    try:
+        kernel, kwargs = compiled(func, kwargs)
+        _block(out.array, axis, index)[...] = kernel(_block(source.array, axis, index), *args, **kwargs)
+    finally:
+        args = None
+        source.close()
+        out.close()
+
+
+def process_map(func, A, *args, axis=1, workers=None, chunksize=None,
+                executor=None, out=None, **kwargs):
+    """
+    Calls `func(block, *args, **kwargs)` for blocks of
+    columns (`axis=1`) or rows (`axis=0`) of `A` on a
+    pool of `workers` processes, writing each result
+    into the same columns (or rows) of the result.
+
+    For example `func` could be `ewma_2d` for many
+    series at once, or a function correlating a block
+    of columns with every column of an array passed
+    in `args`.
+
+    `A` (and any arrays in `args`) are placed in
+    shared memory, unless they're already a
+    `SharedArray`, so the workers don't receive a copy.
+    The result is written into `out` (which can also
+    be a `SharedArray`) if given, otherwise into a new
+    array sized from the result of the first block.
+
+    The first block is computed in the calling
+    process. Each worker compiles `func` (as in `map`)
+    with its own caches; configuring the on-disk cache
+    (see `fastats.core.disk_cache`) avoids compiling it
+    in every process. `func` and its overrides are
+    sent by reference, so they must be importable.
+
+    Pass a `concurrent.futures.ProcessPoolExecutor`
+    as `executor` to reuse its processes between
+    calls; otherwise a pool using the 'spawn' start
+    method is created for the call, as numba's
+    threading layer isn't fork-safe.
+    """
+    shared = []
+
+    def share(a):
+        if isinstance(a, SharedArray):
+            return a
+        for original, copy in shared:
+            if original is a:
+                return copy
+        copy = SharedArray.copy(a)
+        shared.append((a, copy))
+        return copy
+
+    source = share(A)
+    args = [share(a) if isinstance(a, np.ndarray) else a for a in args]
+    shared_out = out if isinstance(out, SharedArray) else None
+    try:
+        local_args = [a.array if isinstance(a, SharedArray) else a for a in args]
+        n = source.array.shape[axis]
+        workers = _workers(workers)
+        blocks = _batches(n, workers, chunksize)
+        if not blocks:
+            raise ValueError('process_map needs a non-empty array')
+
+        kernel, call_kwargs = compiled(func, dict(kwargs))
+        indices = [slice(b.start, b.stop) for b in blocks]
+        first = kernel(_block(source.array, axis, indices[0]), *local_args, **call_kwargs)
+        local_args = None
+
+        if shared_out is None:
+            shape = list(np.shape(first))
+            shape[0 if axis == 0 else -1] = n
+            shared_out = SharedArray(tuple(shape), np.asarray(first).dtype)
+            shared.append((None, shared_out))
+        _block(shared_out.array, axis, indices[0])[...] = first
+        first = None
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            futures = [
+                executor.submit(_run_block, func, source, shared_out, axis, index, args, kwargs)
+                for index in indices[1:]
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+        if isinstance(out, SharedArray):
+            return out.array
+        if out is None:
+            out = np.empty_like(shared_out.array)
+        out[...] = shared_out.array
+        return out
+    finally:
+        for _, copy in shared:
+            copy.close()
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
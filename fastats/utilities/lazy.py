@@ -0,0 +1,48 @@
+import sys
+from importlib import import_module
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """
+    The module type for packages whose public attributes
+    are only imported from their modules on first access.
+
+    This defers importing numba and scipy until they're
+    actually needed.
+    """
+    def __getattr__(self, name):
+        try:
+            module_name = self._lazy_attributes[name]
+        except KeyError:
+            raise AttributeError(
+                'module {!r} has no attribute {!r}'.format(self.__name__, name)
+            ) from None
+
+        value = getattr(import_module(module_name), name)
+        setattr(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        # Once a submodule is imported, the import system sets it as
+        # an attribute of its package. Several submodules share their
+        # name with the function they define (for example `lu.lu`),
+        # so the module would hide the function - those are skipped,
+        # leaving the function to be resolved by `__getattr__`.
+        if isinstance(value, ModuleType) and name in self._lazy_attributes:
+            return
+        super().__setattr__(name, value)
+
+    def __dir__(self):
+        return sorted(set(vars(self)) | set(self._lazy_attributes))
+
+
+def lazy_package(name, attributes):
+    """
+    Converts the (already imported) package `name` to a
+    `LazyModule`, which imports each key of `attributes`
+    from the module it maps to on first access.
+    """
+    module = sys.modules[name]
+    module.__dict__['_lazy_attributes'] = attributes
+    module.__class__ = LazyModule
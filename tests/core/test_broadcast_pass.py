@@ -0,0 +1,53 @@
+import math
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from fastats import broadcast_pass
+
+
+def my_demo(a):
+    return a * a + 2 * a + 1
+
+
+def test_broadcast_any_dimensions():
+    for shape in [(10,), (10, 3), (4, 3, 5), (2, 3, 4, 5)]:
+        data = np.random.RandomState(0).rand(*shape)
+
+        result = broadcast_pass(data, value=my_demo)
+
+        assert result.shape == shape
+        assert_allclose(result, my_demo(data))
+
+
+def test_broadcast_non_contiguous():
+    data = np.random.RandomState(1).rand(6, 5, 4)
+
+    for view in [data[:, ::2], data.T, data[::-1, 1:, ::3]]:
+        assert_allclose(broadcast_pass(view, value=my_demo), my_demo(view))
+
+
+def test_broadcast_matches_without_overrides():
+    data = np.arange(24.0).reshape(2, 3, 4)
+
+    assert_allclose(broadcast_pass(data), data)
+
+
+def test_broadcast_out_and_dtype():
+    data = np.arange(1, 25).reshape(2, 3, 4)
+
+    def log(x):  # pragma: no cover
+        return math.log(x)
+
+    result = broadcast_pass(data, value=log, dtype=np.float64)
+    assert result.dtype == np.float64
+    assert_allclose(result, np.log(data))
+
+    out = np.empty((4, 3, 2), order='F').transpose()
+    assert broadcast_pass(data * 1.0, out=out, value=my_demo) is out
+    assert_allclose(out, my_demo(data * 1.0))
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
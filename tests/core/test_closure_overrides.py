@@ -0,0 +1,78 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+from fastats import fs, single_pass
+from fastats.core import disk_cache
+
+
+def child(a):  # pragma: no cover
+    return a
+
+
+@fs
+def parent(a):  # pragma: no cover
+    return child(a) * 2
+
+
+def make_scaler(factor, offset=1.0):
+    def scale(x):  # pragma: no cover
+        return x * factor + offset
+    return scale
+
+
+def test_inline_function():
+    def cube(a):  # pragma: no cover
+        return a * a * a
+
+    assert parent(4, child=cube) == 128
+
+
+def test_closure_free_variables():
+    data = np.arange(5.0)
+
+    assert_allclose(single_pass(data, value=make_scaler(3.0)), data * 3 + 1)
+    assert_allclose(single_pass(data, value=make_scaler(2.0, 0.5)), data * 2 + 0.5)
+
+
+def test_closure_calling_closure():
+    k = 10.0
+
+    def inner(x):  # pragma: no cover
+        return x + k
+
+    def outer(x):  # pragma: no cover
+        return inner(x) * 2
+
+    data = np.arange(3.0)
+    assert_allclose(single_pass(data, value=outer), (data + k) * 2)
+
+
+def test_closure_capturing_array():
+    weights = np.array([1.0, 2.0, 3.0])
+
+    def weighted(x):  # pragma: no cover
+        return np.sum(x * weights)
+
+    data = np.ones((4, 3))
+    result = single_pass(data, value=weighted)
+    assert_allclose(result[:, 0], 6.0)
+
+
+def test_closures_not_shared_through_disk_cache(tmp_path):
+    previous = disk_cache.get_cache_dir()
+    disk_cache.set_cache_dir(tmp_path)
+    fs.cache_clear()
+    try:
+        data = np.arange(4.0)
+        assert_allclose(single_pass(data, value=make_scaler(5.0)), data * 5 + 1)
+
+        fs.cache_clear()
+        assert_allclose(single_pass(data, value=make_scaler(7.0)), data * 7 + 1)
+    finally:
+        disk_cache.set_cache_dir(previous)
+        fs.cache_clear()
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
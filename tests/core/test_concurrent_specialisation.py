@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+import fastats.core.windowed_pass as windowed_pass_module
+from fastats import fs, windowed_pass
+
+
+def window_sum(x):
+    return np.sum(x)
+
+
+def window_max(x):
+    return np.max(x)
+
+
+def window_min(x):
+    return np.min(x)
+
+
+def window_first(x):
+    return x[0]
+
+
+def test_module_globals_not_modified():
+    before = dict(vars(windowed_pass_module))
+
+    data = np.arange(10, dtype='float')
+    windowed_pass(data, 3, value=window_sum)
+
+    after = vars(windowed_pass_module)
+    assert set(after) == set(before)
+    assert all(after[k] is v for k, v in before.items())
+
+
+def test_concurrent_specialisation():
+    fs.cache_clear()
+    data = np.arange(50, dtype='float')
+    win = 5
+    funcs = [window_sum, window_max, window_min, window_first] * 4
+
+    def run(value):
+        return windowed_pass(data, win, value=value)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(run, funcs))
+
+    for func, result in zip(funcs, results):
+        expected = [func(data[i - win:i]) for i in range(win, data.shape[0] + 1)]
+        assert np.isnan(result[:win - 1]).all()
+        assert_allclose(result[win - 1:], expected)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
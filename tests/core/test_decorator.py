@@ -1,4 +1,10 @@
 
+import importlib
+import sys
+from concurrent.futures import wait
+
+import numpy as np
+
 from fastats.core.decorator import fs
 
 
@@ -30,6 +36,98 @@ def test_fs_decorated_functions_as_kwargs_to_another():
     assert func(4, square=cube) == 32.0
 
 
+def halve(x):  # pragma: no cover
+    return x / 2
+
+
+def test_specialisations_are_cached():
+    fs.cache_clear()
+
+    first = func(6, square=halve, return_callable=True)
+    second = func(6, square=halve, return_callable=True)
+    assert first is second
+    assert first(6) == 1.5
+
+    info = fs.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.currsize == 1
+
+    assert func(6, square=cube, return_callable=True) is not first
+    assert fs.cache_info().currsize == 2
+
+
+def test_nested_function_overrides_hit_cache():
+    fs.cache_clear()
+
+    results = []
+    for i in range(3):
+        def triple(x):  # pragma: no cover
+            return x * 3
+        results.append(func(4, square=triple))
+
+    assert results == [6.0, 6.0, 6.0]
+    assert fs.cache_info().misses == 1
+    assert fs.cache_info().hits == 2
+
+
+def test_reloaded_overrides_not_shared(tmp_path, monkeypatch):
+    fs.cache_clear()
+    module = tmp_path / 'reloaded_module.py'
+    module.write_text('K = 2.0\n\n\ndef scale(x):\n    return x * K\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    data = np.arange(3, dtype='float64')
+
+    import reloaded_module
+    try:
+        assert func(data, square=reloaded_module.scale).tolist() == [0, 1, 2]
+
+        module.write_text('K = 10.0\n\n\ndef scale(x):\n    return x * K\n')
+        importlib.reload(reloaded_module)
+
+        assert func(data, square=reloaded_module.scale).tolist() == [0, 5, 10]
+        assert fs.cache_info().misses == 2
+    finally:
+        sys.modules.pop('reloaded_module', None)
+
+
+def test_cache_clear():
+    func(6, square=halve)
+    assert fs.cache_info().currsize > 0
+
+    fs.cache_clear()
+    info = fs.cache_info()
+    assert info.currsize == 0
+    assert info.hits == 0
+    assert info.misses == 0
+
+
+def test_compile_async():
+    fs.cache_clear()
+
+    future = func.compile_async(square=halve, signatures=['float64(float64)'])
+    specialised = future.result()
+
+    assert len(specialised.signatures) == 1
+    assert specialised(6.0) == 1.5
+    assert func(6.0, square=halve, return_callable=True) is specialised
+
+
+def test_compile_async_many():
+    fs.cache_clear()
+
+    futures = [
+        func.compile_async(square=f, signatures=['int64(int64)'])
+        for f in (halve, cube, square)
+    ]
+    done, not_done = wait(futures)
+
+    assert not not_done
+    results = [f.result()(4) for f in futures]
+    assert results == [1.0, 32.0, 8.0]
+    assert fs.cache_info().currsize == 3
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
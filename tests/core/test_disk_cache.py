@@ -0,0 +1,131 @@
+import importlib
+import os
+import sys
+
+import numpy as np
+from pytest import fixture
+
+from fastats import fs, single_pass
+from fastats.core import disk_cache
+
+
+def quadruple(x):  # pragma: no cover
+    return x * 4
+
+
+def halve(x):  # pragma: no cover
+    return x / 2
+
+
+def first(x):  # pragma: no cover
+    return x
+
+
+def second(x):  # pragma: no cover
+    return x
+
+
+@fs
+def combo(a, b):  # pragma: no cover
+    return first(a) - second(b)
+
+
+@fixture
+def cache_dir(tmp_path):
+    previous = disk_cache.get_cache_dir()
+    disk_cache.set_cache_dir(tmp_path)
+    fs.cache_clear()
+    yield tmp_path
+    disk_cache.set_cache_dir(previous)
+    fs.cache_clear()
+
+
+def test_specialisation_source_written_to_cache_dir(cache_dir):
+    data = np.arange(5, dtype='float64')
+
+    result = single_pass(data, value=quadruple)
+
+    assert np.allclose(result, data * 4)
+    sources = [f for f in os.listdir(cache_dir) if f.endswith('.py')]
+    assert any(f.startswith('single_pass_') for f in sources)
+    assert any(f.startswith('quadruple_') for f in sources)
+
+
+def test_specialisation_reloaded_from_disk(cache_dir):
+    data = np.arange(5, dtype='float64')
+
+    first = single_pass(value=quadruple, return_callable=True)
+    assert np.allclose(first(data), data * 4)
+    assert sum(first.stats.cache_misses.values()) == 1
+    assert sum(first.stats.cache_hits.values()) == 0
+
+    # Simulate a fresh process by dropping the in-memory cache.
+    fs.cache_clear()
+
+    second = single_pass(value=quadruple, return_callable=True)
+    assert second is not first
+    assert np.allclose(second(data), data * 4)
+    assert sum(second.stats.cache_hits.values()) == 1
+
+
+def test_fingerprint_depends_on_substituted_functions(cache_dir):
+    def fivefold(x):  # pragma: no cover
+        return x * 5
+
+    first = single_pass(value=quadruple, return_callable=True)
+    second = single_pass(value=fivefold, return_callable=True)
+
+    assert first.py_func._fastats_fingerprint != second.py_func._fastats_fingerprint
+
+
+def test_swapped_overrides_not_shared(cache_dir):
+    assert combo(3.0, 4.0, first=quadruple, second=halve) == 10.0
+
+    # Simulate a fresh process by dropping the in-memory cache.
+    fs.cache_clear()
+
+    assert combo(3.0, 4.0, first=halve, second=quadruple) == -14.5
+
+
+def test_changed_globals_not_shared(cache_dir, tmp_path, monkeypatch):
+    module = tmp_path / 'scaled_module.py'
+    module.write_text('K = 2.0\n\n\ndef scale(x):\n    return x * K\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    data = np.arange(3, dtype='float64')
+
+    import scaled_module
+    try:
+        assert np.allclose(single_pass(data, value=scaled_module.scale), [0, 2, 4])
+
+        # Edit the module and simulate a fresh process.
+        module.write_text('K = 10.0\n\n\ndef scale(x):\n    return x * K\n')
+        importlib.reload(scaled_module)
+        fs.cache_clear()
+
+        assert np.allclose(single_pass(data, value=scaled_module.scale), [0, 10, 20])
+    finally:
+        sys.modules.pop('scaled_module', None)
+
+
+def test_fingerprint_without_source():
+    namespace = {}
+    exec(compile('def no_source(x):\n    return x\n', '<string>', 'exec'), namespace)
+
+    assert len(disk_cache.fingerprint(namespace['no_source'])) == 64
+
+
+def test_disabled_by_default_uses_placeholder_filename():
+    previous = disk_cache.get_cache_dir()
+    disk_cache.set_cache_dir(None)
+    fs.cache_clear()
+    try:
+        func = single_pass(value=quadruple, return_callable=True)
+        assert func.py_func.__code__.co_filename == '<fastats>'
+    finally:
+        disk_cache.set_cache_dir(previous)
+        fs.cache_clear()
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
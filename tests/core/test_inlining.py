@@ -0,0 +1,78 @@
+import re
+
+import numpy as np
+from numba import types
+from numpy.testing import assert_allclose
+
+from fastats import fs, single_pass, windowed_pass
+from fastats.maths import deriv
+
+
+def affine(x):  # pragma: no cover
+    return x * 2.0 + 1.0
+
+
+def mean(x):  # pragma: no cover
+    return np.sum(x) / x.size
+
+
+def dispatcher_calls(func):
+    """
+    The calls to other compiled functions left in
+    the numba IR of the (only) compiled signature.
+    """
+    overload = func.overloads[func.signatures[0]]
+    typemap = overload.type_annotation.typemap
+    return [
+        expr for expr in overload.type_annotation.calltypes
+        if getattr(expr, 'op', None) == 'call'
+        and isinstance(typemap[expr.func.name], types.Dispatcher)
+    ]
+
+
+def test_inlined_results_match():
+    data = np.random.RandomState(0).rand(1000)
+
+    assert_allclose(single_pass(data, value=affine, inline=True), data * 2 + 1)
+    assert_allclose(
+        windowed_pass(data, 10, value=mean, inline=True)[9:],
+        windowed_pass(data, 10, value=mean)[9:]
+    )
+
+
+def test_substituted_function_inlined():
+    data = np.arange(10.0)
+
+    called = single_pass(value=affine, return_callable=True)
+    inlined = single_pass(value=affine, inline=True, return_callable=True)
+    called(data)
+    inlined(data)
+
+    assert inlined is not called
+    assert len(dispatcher_calls(called)) == 1
+    assert len(dispatcher_calls(inlined)) == 0
+
+
+def test_nested_calls_inlined():
+    def cube(x):  # pragma: no cover
+        return x * x * x
+
+    compiled = fs(deriv)(root=cube, inline=True, return_callable=True)
+
+    assert abs(compiled(2.0, 1e-3) - 12.0) < 1e-5
+    assert dispatcher_calls(compiled) == []
+
+
+def test_inlined_loop_is_vectorised():
+    data = np.random.RandomState(1).rand(10000)
+
+    inlined = single_pass(value=affine, inline=True, return_callable=True)
+    inlined(data)
+
+    llvm_ir = inlined.inspect_llvm(inlined.signatures[0])
+    assert re.search(r'<\d+ x double>', llvm_ir)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
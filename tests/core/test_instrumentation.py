@@ -0,0 +1,73 @@
+import logging
+
+import numpy as np
+
+from fastats import fs, single_pass
+from fastats.core import instrumentation
+from fastats.core.instrumentation import STAGES, add_listener, remove_listener, stats
+
+
+def negate(x):  # pragma: no cover
+    return -x
+
+
+def test_stats_record_every_stage():
+    fs.cache_clear()
+    stats.reset()
+
+    data = np.arange(5, dtype='float64')
+    single_pass(data, value=negate)
+    single_pass(data, value=negate)
+
+    snapshot = stats.snapshot()
+    counts = snapshot['counts']
+    assert counts['cache_miss'] == 1
+    assert counts['cache_hit'] == 1
+    for stage in STAGES[2:]:
+        assert counts[stage] >= 1, stage
+        assert snapshot['durations'][stage] >= 0.0
+
+    assert snapshot['signatures']['single_pass'] == [
+        '(array(float64, 1d, C), omitted(default=None), omitted(default=None))'
+    ]
+
+
+def test_unrelated_numba_compilation_not_recorded():
+    from numba import njit
+
+    stats.reset()
+
+    @njit
+    def unrelated(x):  # pragma: no cover
+        return x + 1
+
+    assert unrelated(1) == 2
+    assert stats.snapshot()['counts'] == {}
+
+
+def test_listener_receives_events():
+    fs.cache_clear()
+    events = []
+    add_listener(events.append)
+    try:
+        single_pass(np.arange(3, dtype='float32'), value=negate)
+    finally:
+        remove_listener(events.append)
+
+    stages = [e.stage for e in events]
+    assert stages[0] == 'cache_miss'
+    assert stages.count('numba_compile') == 2
+    assert {e.name for e in events if e.stage == 'numba_compile'} == {'single_pass', 'negate'}
+
+
+def test_log_listener(caplog):
+    event = instrumentation.CompileEvent('f', 'numba_compile', 0.5, '(int64,)')
+    with caplog.at_level(logging.INFO, logger='fastats.compile'):
+        instrumentation._log(event)
+
+    assert 'numba_compile f 0.500000s (int64,)' in caplog.text
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
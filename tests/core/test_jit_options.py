@@ -0,0 +1,99 @@
+import numpy as np
+from numba.core.registry import CPUDispatcher
+from numpy.testing import assert_allclose
+from pytest import fixture, raises
+
+from fastats import fs, single_pass, single_pass_parallel
+
+
+def twice(x):  # pragma: no cover
+    return x * 2
+
+
+def next_element(x):  # pragma: no cover
+    return x[x.shape[0]]
+
+
+@fixture
+def defaults():
+    yield fs
+    fs.set_default_jit_options()
+    fs.cache_clear()
+
+
+def substituted(specialised, name):
+    """
+    The compiled override called by `specialised`.
+    """
+    return [
+        v for v in specialised.py_func.__globals__.values()
+        if isinstance(v, CPUDispatcher) and v.py_func.__name__ == name
+    ][0]
+
+
+def test_call_options_in_cache_key():
+    plain = single_pass(value=twice, return_callable=True)
+    fast = single_pass(value=twice, jit_options={'fastmath': True}, return_callable=True)
+
+    assert fast is not plain
+    assert fast is single_pass(value=twice, jit_options={'fastmath': True}, return_callable=True)
+    assert fast.targetoptions['fastmath']
+    assert 'fastmath' not in plain.targetoptions
+
+
+def test_call_options_result():
+    data = np.arange(10.0)
+
+    result = single_pass(data, value=twice, jit_options={'fastmath': True, 'error_model': 'numpy'})
+
+    assert_allclose(result, data * 2)
+
+
+def test_options_apply_to_substituted_functions():
+    fast = single_pass(value=twice, jit_options={'fastmath': True}, return_callable=True)
+    fast(np.arange(3.0))
+
+    assert substituted(fast, 'twice').targetoptions['fastmath']
+
+
+def test_parallel_only_applies_to_top_level():
+    func = single_pass_parallel(value=twice, return_callable=True)
+    func(np.arange(3.0))
+
+    assert func.targetoptions['parallel']
+    assert 'parallel' not in substituted(func, 'twice').targetoptions
+
+
+def test_boundscheck():
+    data = np.ones((3, 2))
+
+    with raises(IndexError):
+        single_pass(data, value=next_element, jit_options={'boundscheck': True})
+
+
+def test_call_options_override_decorator():
+    @fs(fastmath=True)
+    def apply(x):  # pragma: no cover
+        return twice(x)
+
+    assert apply.specialise().targetoptions['fastmath']
+    assert not apply.specialise(jit_options={'fastmath': False}).targetoptions['fastmath']
+
+
+def test_default_options(defaults):
+    defaults.set_default_jit_options(fastmath=True)
+    assert defaults.get_default_jit_options() == {'fastmath': True}
+
+    func = single_pass(value=twice, return_callable=True)
+    assert func.targetoptions['fastmath']
+
+    func = single_pass(value=twice, jit_options={'fastmath': False}, return_callable=True)
+    assert not func.targetoptions['fastmath']
+
+    defaults.set_default_jit_options()
+    assert 'fastmath' not in single_pass(value=twice, return_callable=True).targetoptions
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,69 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.testing import assert_allclose
+
+from fastats import fs, single_pass, windowed_pass
+from fastats.core.decorator import Specialisation, _rebuild
+from fastats.maths import relu
+
+
+def twice(x):  # pragma: no cover
+    return x * 2
+
+
+def mean(x):  # pragma: no cover
+    return np.sum(x) / x.size
+
+
+def test_pickled_by_recipe():
+    specialised = single_pass(value=twice, jit_options={'fastmath': True}, return_callable=True)
+    assert isinstance(specialised, Specialisation)
+
+    owner, decorator_options, overrides, options = specialised.fastats_recipe
+    assert owner is single_pass
+    assert overrides == {'value': twice}
+    assert options == {'fastmath': True}
+
+    # Unpickling goes through the specialisation cache.
+    assert pickle.loads(pickle.dumps(specialised)) is specialised
+
+
+def test_pickled_by_recipe_without_decorated_reference():
+    specialised = fs(relu).specialise(jit_options={'boundscheck': True})
+
+    assert specialised.fastats_recipe[0] is relu
+    assert pickle.loads(pickle.dumps(specialised)) is specialised
+
+
+def test_closure_pickled_by_value():
+    factor = 3.0
+
+    def scale(x):  # pragma: no cover
+        return x * factor
+
+    specialised = single_pass(value=scale, return_callable=True)
+    rebuilt = pickle.loads(pickle.dumps(specialised))
+
+    assert specialised.__reduce__()[0] is not _rebuild
+    assert_allclose(rebuilt(np.arange(3.0)), [0.0, 3.0, 6.0])
+
+
+def test_process_pool():
+    rolling_mean = windowed_pass(value=mean, return_callable=True)
+    chunks = np.random.RandomState(0).rand(4, 100)
+
+    # numba's threading layer isn't fork-safe.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(2, mp_context=context) as executor:
+        results = list(executor.map(rolling_mean, chunks, [10] * len(chunks)))
+
+    for chunk, result in zip(chunks, results):
+        assert_allclose(result, rolling_mean(chunk, 10))
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,120 @@
+from functools import partial
+
+import numpy as np
+from numpy.testing import assert_allclose
+from pytest import raises
+
+from fastats import pipeline, single_pass, windowed_pass
+from fastats.core.pipeline import kernel
+
+
+def square(x):  # pragma: no cover
+    return x * x
+
+
+def mean(x):  # pragma: no cover
+    return np.sum(x) / x.size
+
+
+def spread(x):  # pragma: no cover
+    return np.max(x) - np.min(x)
+
+
+def halve(x):  # pragma: no cover
+    return x / 2
+
+
+def data():
+    return np.random.RandomState(0).randn(200)
+
+
+def test_single_then_windowed():
+    x = data()
+    fused = pipeline(
+        partial(single_pass, value=square),
+        partial(windowed_pass, win=10, value=mean),
+    )
+
+    expected = windowed_pass(single_pass(x, value=square), 10, value=mean)
+    assert_allclose(fused(x), expected)
+
+
+def test_windowed_chains():
+    x = data()
+    fused = pipeline(
+        partial(windowed_pass, win=5, value=mean),
+        partial(single_pass, value=halve),
+        partial(windowed_pass, win=7, value=spread),
+        partial(single_pass, value=square),
+    )
+
+    expected = windowed_pass(x, 5, value=mean)
+    expected = single_pass(expected, value=halve)
+    expected = windowed_pass(expected, 7, value=spread)
+    expected = single_pass(expected, value=square)
+
+    result = fused(x)
+    assert np.isnan(result[:10]).all()
+    assert_allclose(result, expected)
+
+
+def test_single_stage():
+    x = data()
+
+    assert_allclose(pipeline(partial(single_pass, value=square))(x), x * x)
+
+
+def test_out_and_dtype():
+    x = np.arange(20)
+    fused = pipeline(
+        partial(single_pass, value=halve),
+        partial(windowed_pass, win=4, value=mean),
+    )
+
+    result = fused(x, dtype=np.float32)
+    assert result.dtype == np.float32
+    assert_allclose(result[3:], np.arange(1.5, 18.5) / 2)
+
+    out = np.empty(20)
+    assert fused(x, out=out) is out
+    assert_allclose(out[3:], np.arange(1.5, 18.5) / 2)
+
+
+def test_kernels_shared_between_pipelines():
+    first = pipeline(partial(single_pass, value=square), partial(windowed_pass, win=3, value=mean))
+    second = pipeline(partial(single_pass, value=halve), partial(windowed_pass, win=3, value=spread))
+
+    assert first._kernel is second._kernel is kernel((0, 3))
+    assert repr(first) == 'pipeline(single_pass, windowed_pass(3))'
+
+
+def test_invalid_stages():
+    with raises(ValueError):
+        pipeline()
+    with raises(TypeError):
+        pipeline(square)
+    with raises(TypeError):
+        pipeline(partial(windowed_pass, 3, value=mean))
+    with raises(TypeError):
+        pipeline(partial(single_pass, value=square, out=np.empty(3)))
+    with raises(TypeError):
+        pipeline(partial(single_pass))
+    with raises(ValueError):
+        pipeline(partial(windowed_pass, value=mean))
+    with raises(ValueError):
+        pipeline(partial(windowed_pass, win=2.5, value=mean))
+    with raises(ValueError):
+        pipeline(partial(single_pass, value=square, helper=mean), partial(single_pass, value=halve, helper=spread))
+
+
+def test_numpy_integer_window():
+    x = np.random.RandomState(0).rand(20)
+
+    result = pipeline(partial(windowed_pass, win=np.int64(3), value=mean))(x)
+
+    assert_allclose(result, windowed_pass(x, 3, value=mean))
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+from numba import float32, float64
+from numpy.testing import assert_allclose
+from pytest import raises
+
+from fastats import precompile, single_pass, warmup
+from fastats.core import disk_cache
+from fastats.maths.ewma import ewma
+from fastats.scaling import standard
+
+
+def cube(x):  # pragma: no cover
+    return x * x * x
+
+
+def test_precompile_fs_function():
+    compiled = precompile(single_pass, [(float32[::1],), (float64[::1],)], value=cube)
+
+    assert len(compiled.signatures) == 2
+    assert single_pass(value=cube, return_callable=True) is compiled
+
+    data = np.arange(4, dtype='float32')
+    assert_allclose(compiled(data), data ** 3)
+    assert len(compiled.signatures) == 2
+
+
+def test_precompile_plain_function():
+    compiled = precompile(ewma, [(float64[::1], float64)])
+
+    assert len(compiled.signatures) == 1
+    assert precompile(ewma, []) is compiled
+
+    data = np.random.RandomState(0).randn(100)
+    assert_allclose(compiled(data, 10.0), ewma(data, 10.0))
+
+
+def test_precompile_full_signature():
+    compiled = precompile(cube, [float64(float64)])
+
+    assert compiled.signatures == [(float64,)]
+    assert compiled(2.0) == 8.0
+
+
+def test_precompile_plain_function_rejects_overrides():
+    with raises(TypeError):
+        precompile(ewma, [], value=cube)
+
+
+def test_warmup_subset():
+    compiled = warmup([standard])
+    dispatcher = compiled[standard]
+
+    assert len(dispatcher.signatures) == 2
+
+    data = np.random.RandomState(0).randn(50, 3).astype('float32')
+    assert_allclose(dispatcher(data), standard(data), rtol=1e-5)
+    assert len(dispatcher.signatures) == 2
+
+
+def test_warmup_all(monkeypatch):
+    from fastats.core import precompile as module
+
+    monkeypatch.setattr(module, '_warmup_signatures', lambda: {ewma: [(float64[::1], float64)]})
+
+    compiled = warmup()
+
+    assert list(compiled) == [ewma]
+    assert len(compiled[ewma].signatures) >= 1
+
+
+def test_warmed_functions_not_recompiled():
+    import fastats.jit
+
+    dispatcher = warmup([ewma])[ewma]
+    compiled = len(dispatcher.signatures)
+
+    data = np.random.RandomState(0).randn(100)
+    assert fastats.jit.ewma is dispatcher
+    assert_allclose(fastats.jit.ewma(data, 10.0), ewma(data, 10.0))
+    assert len(dispatcher.signatures) == compiled
+
+
+def test_warmup_persisted_to_cache_dir(tmp_path):
+    previous = disk_cache.get_cache_dir()
+    disk_cache.set_cache_dir(tmp_path)
+    try:
+        dispatcher = warmup([ewma])[ewma]
+    finally:
+        disk_cache.set_cache_dir(previous)
+
+    assert dispatcher.py_func.__code__.co_filename.startswith(str(tmp_path))
+    assert any(f.endswith('.nbi') for _, _, files in os.walk(tmp_path) for f in files)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,299 @@
+import numpy as np
+import scipy.stats
+from numpy.testing import assert_allclose
+from pytest import mark, raises
+
+from fastats import (
+    rolling_argmax, rolling_argmin, rolling_max, rolling_median, rolling_min, rolling_moments,
+    rolling_quantile,
+    windowed_stateful_pass
+)
+from fastats.core.rolling import (
+    _MOMENTS, _rolling_moments, _rolling_quantiles, deque_state, window_argmax, window_argmin, window_kurt,
+    window_max, window_mean, window_min, window_nanargmax, window_nanargmin, window_nanmax, window_nanmin,
+    window_skew, window_std, window_var
+)
+
+
+def windows(x, win):
+    return [x[i - win + 1:i + 1] for i in range(win - 1, x.size)]
+
+
+def expected(x, win, func):
+    result = np.full(x.size, np.nan)
+    for i, window in enumerate(windows(x, win)):
+        result[i + win - 1] = func(window)
+    return result
+
+
+def data(n=300):
+    # Rounded so windows have repeated extremes.
+    return np.round(np.random.RandomState(0).randn(n), 1)
+
+
+def nan_argmax(x):
+    return np.nan if np.isnan(x).any() else np.argmax(x)
+
+
+def nan_argmin(x):
+    return np.nan if np.isnan(x).any() else np.argmin(x)
+
+
+def python_pass(x, win, value, initial_state):
+    # The loop of `windowed_stateful_pass`, without numba.
+    result = np.full(x.size, np.nan)
+    state = initial_state(x, win)
+    for i in range(win, x.size + 1):
+        val_out = x[i - win - 1] if i > win else np.nan
+        result[i - 1], state = value(x[i - win:i], x[i - 1], val_out, state)
+    return result
+
+
+def skip_nan(func):
+    def wrapped(x):
+        valid = ~np.isnan(x)
+        if not valid.any():
+            return np.nan
+        if func in (np.argmax, np.argmin):
+            filled = np.where(valid, x, -np.inf if func is np.argmax else np.inf)
+            return func(filled)
+        return func(x[valid])
+    return wrapped
+
+
+@mark.parametrize('win', [1, 2, 7, 50])
+def test_matches_brute_force(win):
+    x = data()
+
+    assert_allclose(rolling_max(x, win), expected(x, win, np.max))
+    assert_allclose(rolling_min(x, win), expected(x, win, np.min))
+    assert_allclose(rolling_argmax(x, win), expected(x, win, np.argmax))
+    assert_allclose(rolling_argmin(x, win), expected(x, win, np.argmin))
+
+
+def test_monotonic_input():
+    # The worst cases for the deque: every value is
+    # either kept or removed straight away.
+    x = np.arange(100.0)
+
+    assert_allclose(rolling_max(x, 10)[9:], x[9:])
+    assert_allclose(rolling_min(x, 10)[9:], x[:-9])
+    assert_allclose(rolling_argmax(x[::-1].copy(), 10)[9:], np.zeros(91))
+
+
+@mark.parametrize('win', [1, 3, 10])
+def test_nans(win):
+    x = data()
+    x[np.random.RandomState(1).rand(x.size) < 0.3] = np.nan
+    x[100:120] = np.nan
+
+    assert_allclose(rolling_max(x, win), expected(x, win, np.max))
+    assert_allclose(rolling_argmax(x, win), expected(x, win, nan_argmax))
+    assert_allclose(rolling_argmin(x, win), expected(x, win, nan_argmin))
+
+    for func, rolling in [(np.max, rolling_max), (np.min, rolling_min),
+                          (np.argmax, rolling_argmax), (np.argmin, rolling_argmin)]:
+        assert_allclose(rolling(x, win, skipna=True), expected(x, win, skip_nan(func)))
+
+
+def test_columns():
+    x = data(600).reshape(200, 3)
+    x[np.random.RandomState(1).rand(*x.shape) < 0.1] = np.nan
+
+    for rolling, skipna in [(rolling_max, False), (rolling_max, True), (rolling_argmin, True)]:
+        result = rolling(x, 6, skipna=skipna)
+        for j in range(x.shape[1]):
+            assert_allclose(result[:, j], rolling(x[:, j], 6, skipna=skipna))
+
+
+def test_extreme_arguments():
+    x = np.array([3, 1, 2, 5])
+
+    assert_allclose(rolling_max(x, 2), [np.nan, 3.0, 2.0, 5.0])
+    assert_allclose(rolling_argmin(x, 4), [np.nan] * 3 + [1.0])
+    for win in (0, 5):
+        with raises(ValueError):
+            rolling_max(x, win)
+    with raises(ValueError):
+        rolling_min(np.ones((2, 2)), 3)
+    with raises(ValueError):
+        rolling_min(np.ones((2, 2, 2)), 1)
+
+
+def test_kernels():
+    x = data()
+
+    assert_allclose(
+        windowed_stateful_pass(x, 5, value=window_max, initial_state=deque_state),
+        rolling_max(x, 5)
+    )
+    assert_allclose(
+        windowed_stateful_pass(x, 5, value=window_nanargmin, initial_state=deque_state),
+        rolling_argmin(x, 5, skipna=True)
+    )
+
+
+def test_kernels_without_numba():
+    x = data(40)
+    x[[3, 17, 18]] = np.nan
+    x[25:30] = np.nan
+
+    for kernel, rolling, skipna in [(window_max, rolling_max, False), (window_min, rolling_min, False),
+                                    (window_argmax, rolling_argmax, False),
+                                    (window_argmin, rolling_argmin, False),
+                                    (window_nanmax, rolling_max, True), (window_nanmin, rolling_min, True),
+                                    (window_nanargmax, rolling_argmax, True),
+                                    (window_nanargmin, rolling_argmin, True)]:
+        assert_allclose(python_pass(x, 4, kernel, deque_state), rolling(x, 4, skipna=skipna))
+
+
+@mark.parametrize('win', [1, 2, 9, 64])
+def test_quantiles_match_numpy(win):
+    x = data()
+    qs = [0.0, 0.1, 0.5, 0.75, 1.0]
+
+    result = rolling_quantile(x, win, qs)
+
+    assert result.shape == (x.size, len(qs))
+    for j, q in enumerate(qs):
+        assert_allclose(result[:, j], expected(x, win, lambda w: np.quantile(w, q)), atol=1e-12)
+    assert_allclose(rolling_median(x, win), expected(x, win, np.median))
+
+
+@mark.parametrize('win', [1, 4, 15])
+def test_quantiles_with_nans(win):
+    x = data()
+    x[np.random.RandomState(1).rand(x.size) < 0.3] = np.nan
+    x[100:120] = np.nan
+
+    for q in (0.2, 0.5):
+        assert_allclose(
+            rolling_quantile(x, win, q, skipna=True),
+            expected(x, win, lambda w: np.nanquantile(w, q) if (w == w).any() else np.nan)
+        )
+
+    # np.quantile gives NaN for [inf], so only compare medians.
+    x[50] = np.inf
+    assert_allclose(rolling_median(x, win), expected(x, win, np.median))
+
+
+def test_quantiles_without_numba():
+    x = data(60)
+    x[[5, 20, 21]] = np.nan
+    x[40:46] = np.nan
+    qs = np.array([0.0, 0.3, 0.5, 1.0])
+
+    for skipna in (False, True):
+        out = np.empty((x.size, qs.size))
+        _rolling_quantiles(x, 5, qs, skipna, out)
+        assert_allclose(out, rolling_quantile(x, 5, qs, skipna=skipna))
+
+
+def test_quantile_arguments():
+    x = np.arange(10)
+
+    assert_allclose(rolling_median(x, 3)[2:], np.arange(1.0, 9.0))
+    assert rolling_quantile(x, 3, np.array([0.5])).shape == (10, 1)
+    with raises(ValueError):
+        rolling_quantile(x, 3, 1.5)
+    with raises(ValueError):
+        rolling_quantile(x, 0, 0.5)
+    with raises(ValueError):
+        rolling_quantile(x.reshape(5, 2), 3, 0.5)
+
+
+def moments(window, ddof=0):
+    return [
+        np.mean(window), np.var(window, ddof=ddof), np.std(window, ddof=ddof),
+        scipy.stats.skew(window), scipy.stats.kurtosis(window)
+    ]
+
+
+@mark.parametrize('win', [1, 2, 10, 100])
+def test_moments_match_numpy(win):
+    # Offset so the sums of powers would cancel.
+    x = 1e6 + np.random.RandomState(0).randn(1000)
+    names = ['mean', 'var', 'std', 'skew', 'kurt']
+
+    result = rolling_moments(x, win, names)
+
+    assert result.shape == (x.size, len(names))
+    assert np.isnan(result[:win - 1]).all()
+    for i in range(win - 1, x.size):
+        window = x[i - win + 1:i + 1]
+        if win > 2:
+            assert_allclose(result[i], moments(window), rtol=1e-5, atol=1e-6)
+        else:
+            assert_allclose(result[i, :3], moments(window)[:3], rtol=1e-5, atol=1e-9)
+
+
+def test_moments_with_nans():
+    x = data()
+    x[np.random.RandomState(1).rand(x.size) < 0.2] = np.nan
+    x[100:120] = np.nan
+    names = ['mean', 'var', 'std', 'skew', 'kurt']
+
+    result = rolling_moments(x, 10, names, ddof=1, skipna=True)
+
+    assert_allclose(rolling_moments(x, 10, 'std'), expected(x, 10, np.std))
+    for i in range(9, x.size):
+        window = x[i - 9:i + 1]
+        window = window[~np.isnan(window)]
+        if window.size > 1:
+            assert_allclose(result[i, :3], moments(window, ddof=1)[:3], atol=1e-12)
+        if window.size and np.ptp(window) == 0:
+            assert np.isnan(result[i, 3:]).all()
+        elif window.size:
+            assert_allclose(result[i, 3:], moments(window)[3:], atol=1e-12)
+
+
+def test_moment_kernels():
+    x = data(1000) * 100
+
+    assert_allclose(windowed_stateful_pass(x, 50, value=window_mean), rolling_moments(x, 50, 'mean'))
+    assert_allclose(windowed_stateful_pass(x, 50, value=window_std), expected(x, 50, np.std))
+    assert_allclose(windowed_stateful_pass(x, 50, value=window_kurt), expected(x, 50, scipy.stats.kurtosis))
+
+
+def test_moments_without_numba():
+    x = data(80)
+    x[5] = np.nan
+    x[30:38] = np.nan
+    x[50:60] = 1.5
+    codes = np.arange(len(_MOMENTS))
+
+    for ddof, skipna in [(0, False), (1, True)]:
+        out = np.empty((x.size, codes.size))
+        _rolling_moments(x, 4, codes, float(ddof), skipna, out)
+        assert_allclose(out, rolling_moments(x, 4, _MOMENTS, ddof=ddof, skipna=skipna), atol=1e-12)
+
+    def no_state(x, win):
+        return np.empty(0, dtype=x.dtype)
+
+    for kernel, name in [(window_mean, 'mean'), (window_var, 'var'), (window_std, 'std'),
+                         (window_skew, 'skew'), (window_kurt, 'kurt')]:
+        assert_allclose(python_pass(x, 4, kernel, no_state), rolling_moments(x, 4, name), atol=1e-12)
+
+
+def test_moments_of_constant_windows():
+    x = np.full(50, 3.1)
+
+    result = rolling_moments(x, 5, ['mean', 'var', 'skew', 'kurt'])
+
+    assert_allclose(result[4:, :2], [[3.1, 0.0]] * 46, atol=1e-14)
+    assert np.isnan(result[4:, 2:]).all()
+
+
+def test_moment_arguments():
+    assert np.isnan(rolling_moments(np.arange(3.0), 5, 'mean')).all()
+    with raises(ValueError):
+        rolling_moments(np.arange(10.0), 3, ['mean', 'median'])
+    with raises(ValueError):
+        rolling_moments(np.arange(10.0), 0)
+    with raises(ValueError):
+        rolling_moments(np.ones((4, 2)), 2)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
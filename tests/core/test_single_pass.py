@@ -4,7 +4,7 @@ import math
 import numpy as np
 from pytest import approx
 
-from fastats import single_pass
+from fastats import single_pass, single_pass_parallel
 
 
 def twice(x):
@@ -148,6 +148,103 @@ def test_multi_column_support():
     assert result_npy[4][0] == approx(8.5)
 
 
+def test_parallel_matches_serial():
+    data = np.random.RandomState(0).rand(10000)
+
+    def calc(x):
+        return 2 * math.log(x)
+
+    serial = single_pass(data, value=calc)
+    parallel = single_pass_parallel(data, value=calc)
+
+    assert np.allclose(parallel, serial)
+    assert np.allclose(parallel, [calc(v) for v in data])
+
+
+def test_parallel_compiled_with_parallel_target():
+    func = single_pass_parallel(value=twice, return_callable=True)
+
+    assert func.targetoptions['parallel']
+    assert func is not single_pass(value=twice, return_callable=True)
+
+
+def test_parallel_num_threads():
+    from numba import get_num_threads
+
+    data = np.arange(100, dtype='float64')
+    before = get_num_threads()
+
+    result = single_pass_parallel(data, value=twice, num_threads=1)
+
+    assert np.allclose(result, data * 2)
+    assert get_num_threads() == before
+
+
+def test_parallel_without_overrides():
+    data = np.arange(10, dtype='float64')
+    out = np.empty(10, dtype='float32')
+
+    # not using jit, falling back to the "value" function
+    assert np.allclose(single_pass_parallel(data), data)
+    assert single_pass_parallel(data, out=out) is out
+    assert np.allclose(out, data)
+
+
+def test_num_threads_without_overrides_compiles():
+    data = np.arange(10, dtype='float64')
+
+    assert np.allclose(single_pass_parallel(data, num_threads=1), data)
+    assert single_pass_parallel.specialise().targetoptions['parallel']
+
+
+def test_dtype_controls_result_type():
+    data = np.arange(1, 10)
+
+    def calc(x):
+        return 2 * math.log(x)
+
+    assert single_pass(data, value=calc).dtype == data.dtype
+
+    result = single_pass(data, value=calc, dtype=np.float64)
+    assert result.dtype == np.float64
+    assert np.allclose(result, 2 * np.log(data))
+    assert np.allclose(result, [calc(v) for v in data])
+
+    result = single_pass(data, value=calc, dtype=np.dtype('float32'))
+    assert result.dtype == np.float32
+
+
+def test_out_buffer_reused():
+    data = np.arange(1, 10, dtype='float64')
+    out = np.full(9, -1.0)
+
+    result = single_pass(data, out, value=twice)
+    assert result is out
+    assert np.allclose(out, data * 2)
+
+    single_pass_parallel(data, out=out, value=twice)
+    assert np.allclose(out, data * 2)
+
+
+def test_out_memory_mapped(tmp_path):
+    data = np.arange(1, 10, dtype='float64')
+    out = np.memmap(str(tmp_path / 'out.dat'), dtype='float64', mode='w+', shape=data.shape)
+
+    single_pass(data, out=out, value=twice)
+    out.flush()
+
+    on_disk = np.memmap(str(tmp_path / 'out.dat'), dtype='float64', mode='r', shape=data.shape)
+    assert np.allclose(on_disk, data * 2)
+
+
+def test_out_without_overrides():
+    data = np.arange(5, dtype='float64')
+    out = np.empty(5)
+
+    assert single_pass(data, out=out) is out
+    assert np.allclose(out, data)
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
@@ -0,0 +1,100 @@
+import numpy as np
+from numba.np.ufunc.dufunc import DUFunc
+from numpy.testing import assert_allclose
+from pytest import raises
+
+from fastats import fs
+from fastats.core.ast_transforms.convert_to_jit import convert_to_ufunc
+from fastats.maths import logistic, norm_pdf, relu, softplus
+
+
+def square(x):  # pragma: no cover
+    return x * x
+
+
+@fs(target='ufunc')
+def kernel(a, b):  # pragma: no cover
+    return value(a) + b
+
+
+def value(x):  # pragma: no cover
+    return x
+
+
+@fs(layout='(n)->()', signatures=['void(float64[:], float64[:])'])
+def total(x, res):  # pragma: no cover
+    acc = 0.0
+    for i in range(x.shape[0]):
+        acc += value(x[i])
+    res[0] = acc
+
+
+def test_maths_functions_as_ufuncs():
+    data = np.linspace(-5, 5, 1001).reshape(7, 11, 13)
+
+    for func in (logistic, relu, softplus):
+        ufunc = fs(func, target='ufunc')
+        assert_allclose(ufunc(data), func(data))
+
+    pdf = fs(norm_pdf, target='ufunc')
+    assert_allclose(pdf(data, 0.5, np.array([1.0, 2.0])[:, None, None, None]),
+                    norm_pdf(data, 0.5, np.array([1.0, 2.0])[:, None, None, None]))
+
+
+def test_ufunc_overrides_and_cache():
+    a = np.arange(6.0).reshape(2, 3)
+
+    assert_allclose(kernel(a, 1.0), a + 1.0)
+    assert_allclose(kernel(a, 1.0, value=square), a * a + 1.0)
+
+    ufunc = kernel(value=square, return_callable=True)
+    assert isinstance(ufunc, DUFunc)
+    assert kernel(value=square, return_callable=True) is ufunc
+
+
+def test_ufunc_call_kwargs():
+    a = np.arange(5.0)
+    out = np.zeros(5)
+
+    result = kernel(a, 2.0, out=out, value=square)
+
+    assert result is out
+    assert_allclose(out, a * a + 2.0)
+
+    ufunc = kernel(value=square, return_callable=True)
+    # ((0**2 + 1)**2 + 2)**2 + 3
+    assert ufunc.reduce(np.arange(4.0)) == 12.0
+
+
+def test_gufunc():
+    data = np.arange(12.0).reshape(3, 4)
+
+    assert_allclose(total(data), data.sum(axis=1))
+    assert_allclose(total(data, value=square), (data * data).sum(axis=1))
+
+
+def test_dynamic_gufunc():
+    dynamic = fs(total.undecorated, layout='(n)->()')
+    data = np.arange(12.0).reshape(3, 4)
+    out = np.empty(3)
+
+    dynamic(data, out, value=square)
+
+    assert_allclose(out, (data * data).sum(axis=1))
+
+
+def test_parallel_ufunc():
+    parallel = fs(square, target='ufunc', parallel=True, signatures=['float64(float64)'])
+    data = np.arange(1000.0)
+
+    assert_allclose(parallel(data), data * data)
+
+
+def test_convert_to_ufunc_rejects_non_functions():
+    with raises(TypeError):
+        convert_to_ufunc('not a function')
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -1,6 +1,6 @@
 
 import numpy as np
-from pytest import approx
+from pytest import approx, raises
 
 from fastats import windowed_pass, windowed_pass_2d
 from fastats.linear_algebra import ols, r_squared
@@ -243,6 +243,62 @@ def test_windowed_pass_ols_r_squared():
     assert res[6, 1] == approx(0.4)
 
 
+def test_windowed_pass_out_and_dtype():
+    data = np.arange(10)
+
+    result = windowed_pass(data, 3, value=mean, dtype=np.float64)
+    assert result.dtype == np.float64
+    assert np.isnan(result[:2]).all()
+    assert result[2:] == approx(np.arange(1.0, 9.0))
+
+    out = np.zeros(10)
+    assert windowed_pass(data, 3, out=out, value=mean) is out
+    assert np.isnan(out[:2]).all()
+    assert out[2:] == approx(np.arange(1.0, 9.0))
+
+    # Without overrides the pass runs as plain python.
+    out = np.zeros(10)
+    assert windowed_pass(data, 3, out=out) is out
+    assert np.isnan(out[:2]).all()
+    assert (out[2:] == data[:-2]).all()
+
+    out = np.zeros((5, 2))
+    assert windowed_pass_2d(data.reshape(5, 2), 2, out=out) is out
+    assert np.isnan(out[0]).all()
+    assert (out[1:] == data[:-2].reshape(4, 2)).all()
+
+    # An integer `out` can't hold the leading NaNs.
+    with raises(TypeError):
+        windowed_pass(data, 3, out=np.empty(10, dtype=int), value=mean)
+    with raises(TypeError):
+        windowed_pass(data, 3, out=np.empty(10, dtype=int))
+    with raises(TypeError):
+        windowed_pass_2d(data.reshape(5, 2), 2, out=np.empty((5, 2), dtype=int), value=column_sums)
+
+
+def column_sums(x):  # pragma: no cover
+    return np.sum(x, axis=0)
+
+
+def test_windowed_pass_integer_input():
+    data = np.arange(10)
+    # Integer results are padded as `np.full_like(data, np.nan)` pads.
+    padding = np.full_like(data[:2], np.nan)
+
+    raw = windowed_pass(data, 3)
+    assert raw.dtype == data.dtype
+    assert (raw[:2] == padding).all()
+    assert (raw[2:] == data[:-2]).all()
+
+    totals = windowed_pass(data, 3, value=nsum)
+    assert (totals[:2] == padding).all()
+    assert (totals[2:] == np.arange(3, 27, 3)).all()
+
+    pairs = windowed_pass_2d(data.reshape(5, 2), 2, value=column_sums)
+    assert (pairs[0] == padding).all()
+    assert (pairs[1:] == [[2, 4], [6, 8], [10, 12], [14, 16]]).all()
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
@@ -1,8 +1,9 @@
 
 import numpy as np
 from numpy.testing import assert_allclose
+from pytest import raises
 
-from fastats import windowed_stateful_pass
+from fastats import windowed_stateful_pass, windowed_stateful_pass_parallel
 
 
 def test_windowed_stateful_pass_raw():
@@ -108,6 +109,98 @@ def test_windowed_stateful_pass_callable():
     assert_allclose(ret, [np.nan, 12, 18])
 
 
+def test_windowed_stateful_pass_parallel_raw():
+    data = np.arange(12, dtype='float').reshape(6, 2)
+
+    # not using jit, falling back to the "value" function
+    raw = windowed_stateful_pass_parallel(data, 3)
+
+    assert np.isnan(raw[:2]).all()
+    assert_allclose(raw[2:], data[2:])
+
+    out = np.zeros((6, 2))
+    assert windowed_stateful_pass_parallel(data, 3, out=out) is out
+    assert_allclose(out, raw)
+
+    with raises(ValueError):
+        windowed_stateful_pass_parallel(data, 7)
+
+
+def test_windowed_stateful_pass_parallel_columns():
+    data = np.asfortranarray(np.random.RandomState(0).rand(40, 7))
+
+    ret = windowed_stateful_pass_parallel(data, 5, value=rolling_mean)
+
+    assert ret.shape == data.shape
+    for j in range(data.shape[1]):
+        assert_allclose(ret[:, j], windowed_stateful_pass(data[:, j], 5, value=rolling_mean))
+
+    limited = windowed_stateful_pass_parallel(np.ascontiguousarray(data), 5, value=rolling_mean, num_threads=1)
+    assert_allclose(limited, ret)
+
+
+def test_windowed_stateful_pass_parallel_out():
+    data = np.arange(12, dtype='float').reshape(6, 2)
+    out = np.empty((6, 2), dtype=np.float32)
+
+    ret = windowed_stateful_pass_parallel(data, 2, out=out, value=out_flip)
+
+    assert ret is out
+    assert np.isnan(out[0]).all()
+    assert_allclose(out[2:], -data[:-2])
+
+
+def test_windowed_stateful_pass_parallel_window():
+    data = np.arange(12, dtype='float').reshape(6, 2)
+
+    for win in (0, -1, 7):
+        with raises(ValueError):
+            windowed_stateful_pass_parallel(data, win, value=rolling_mean)
+
+    ret = windowed_stateful_pass_parallel(data, 6, value=rolling_mean)
+    assert np.isnan(ret[:5]).all()
+    assert_allclose(ret[5], data.mean(axis=0))
+
+
+def ring_state(x, win):
+    return np.zeros(1, dtype=np.int64), np.empty(win, dtype=x.dtype)
+
+
+def oldest(x, val_in, val_out, state):
+    steps, ring = state
+    if steps[0] == 0:
+        ring[:] = x
+        steps[0] = x.size
+    else:
+        ring[steps[0] % ring.size] = val_in
+        steps[0] += 1
+    return ring[steps[0] % ring.size], state
+
+
+def test_windowed_stateful_pass_initial_state():
+    data = np.arange(10, dtype='float') ** 2
+
+    ret = windowed_stateful_pass(data, 3, value=oldest, initial_state=ring_state)
+
+    assert np.isnan(ret[:2]).all()
+    assert_allclose(ret[2:], data[:-2])
+
+    # The kernel runs without numba as well.
+    state = ring_state(data, 3)
+    assert oldest(data[0:3], data[2], np.nan, state)[0] == data[0]
+    assert oldest(data[1:4], data[3], data[0], state)[0] == data[1]
+
+
+def test_windowed_stateful_pass_parallel_initial_state():
+    data = np.arange(24, dtype='float').reshape(8, 3)
+
+    ret = windowed_stateful_pass_parallel(data, 4, value=oldest, initial_state=ring_state)
+
+    # Each column has its own state.
+    assert np.isnan(ret[:3]).all()
+    assert_allclose(ret[3:], data[:-3])
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
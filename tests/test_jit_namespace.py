@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+from numba.core.registry import CPUDispatcher
+from numpy.testing import assert_allclose
+from pytest import raises
+
+import fastats.jit
+from fastats.core.precompile import jitted
+from fastats.linear_algebra import det
+from fastats.maths import ewma
+from fastats.scaling import standard
+
+
+def test_functions_are_compiled():
+    assert isinstance(fastats.jit.ewma, CPUDispatcher)
+    assert fastats.jit.ewma is fastats.jit.ewma
+
+
+def test_originals_are_untouched():
+    assert not isinstance(ewma, CPUDispatcher)
+    assert fastats.jit.ewma.py_func is not ewma
+
+    data = np.random.RandomState(0).randn(100)
+    assert_allclose(fastats.jit.ewma(data, 10.0), ewma(data, 10.0))
+
+
+def test_recursive_function():
+    A = np.array([[4.0, 1.0, 2.0], [1.0, 5.0, 3.0], [2.0, 3.0, 6.0]])
+
+    assert_allclose(fastats.jit.det(A), det(A))
+    assert_allclose(fastats.jit.det(A), np.linalg.det(A))
+
+
+def test_parallel_function():
+    data = np.random.RandomState(1).rand(50, 4)
+
+    assert fastats.jit.standard_parallel.targetoptions['parallel']
+    assert_allclose(fastats.jit.standard_parallel(data), standard(data))
+
+
+def test_unknown_attribute():
+    with raises(AttributeError):
+        fastats.jit.ols_qr
+
+    assert 'ols_qr' not in fastats.jit.__all__
+    assert 'ewma' in dir(fastats.jit)
+
+
+def test_compiled_code_persisted_to_cache_dir(tmp_path):
+    def triple(x):  # pragma: no cover
+        return x * 3
+
+    compiled = jitted(triple, cache_dir=tmp_path)
+
+    assert compiled(2) == 6
+    assert compiled.py_func.__code__.co_filename.startswith(str(tmp_path))
+    assert any(f.startswith('triple_') for f in os.listdir(tmp_path))
+
+
+def test_unusable_cache_dir_only_disables_caching(tmp_path):
+    def quadruple(x):  # pragma: no cover
+        return x * 4
+
+    not_a_dir = tmp_path / 'file'
+    not_a_dir.write_text('')
+    compiled = jitted(quadruple, cache_dir=not_a_dir)
+
+    assert compiled(2) == 8
+    assert compiled.py_func.__code__.co_filename == '<fastats>'
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,193 @@
+import numpy as np
+from numpy.testing import assert_allclose
+from pytest import fixture, raises
+
+from fastats import fs, lazy, windowed_pass
+from fastats.core.instrumentation import add_listener, remove_listener
+from fastats.maths import ewma, logistic
+from fastats.maths.ewma import ewma_2d
+from fastats.scaling import demean, min_max, standard
+
+
+@fixture
+def kernel_events():
+    events = []
+
+    def listener(compile_event):
+        if compile_event.name == 'lazy_kernel' and compile_event.stage in ('cache_hit', 'cache_miss'):
+            events.append(compile_event.stage)
+
+    fs.cache_clear()
+    add_listener(listener)
+    yield events
+    remove_listener(listener)
+
+
+def data():
+    return np.random.RandomState(0).rand(100, 3)
+
+
+def mean(x):  # pragma: no cover
+    return np.sum(x) / x.size
+
+
+def test_elementwise_matches_numpy():
+    A = data()
+    x = lazy.array(A)
+
+    result = (np.log1p(x * 2) - 1 / (x + 1)) ** 2 + abs(-x)
+
+    expected = (np.log1p(A * 2) - 1 / (A + 1)) ** 2 + abs(-A)
+    assert_allclose(result.compute(), expected)
+    assert_allclose(lazy.compute(result, jit_options={'fastmath': True})[0], expected)
+
+
+def test_chain_fused_into_one_kernel(kernel_events):
+    x = lazy.array(data())
+    y = np.sqrt(x + 1)
+
+    first, second = lazy.compute(y * 2, np.exp(y) - y)
+
+    assert_allclose(first, np.sqrt(data() + 1) * 2)
+    assert_allclose(second, np.exp(np.sqrt(data() + 1)) - np.sqrt(data() + 1))
+    assert kernel_events == ['cache_miss']
+
+
+def test_columns_share_a_kernel(kernel_events):
+    A = data()
+    features = [np.tanh(lazy.array(A[:, i]) * 3 - 0.5) for i in range(A.shape[1])]
+
+    results = lazy.compute(*features)
+
+    for i, result in enumerate(results):
+        assert_allclose(result, np.tanh(A[:, i] * 3 - 0.5))
+    assert kernel_events == ['cache_miss', 'cache_hit', 'cache_hit']
+
+
+def test_common_calls_made_once():
+    calls = []
+
+    def double(x):
+        calls.append(x)
+        return x * 2
+
+    x = lazy.array(np.arange(4.0))
+    total = lazy.call(double, x) + lazy.call(double, x)
+
+    assert_allclose(total.compute(), [0.0, 4.0, 8.0, 12.0])
+    assert len(calls) == 1
+
+
+def test_fastats_functions():
+    A = data()
+    x = lazy.array(A)
+
+    scaled, centred = lazy.compute(lazy.standard(x) * 2, lazy.demean(x + 1))
+    assert_allclose(scaled, standard(A) * 2)
+    assert_allclose(centred, demean(A + 1))
+
+    smoothed = lazy.ewma(lazy.array(A[:, 0]) ** 2, 5.0)
+    assert_allclose(smoothed.compute(), ewma(A[:, 0] ** 2, 5.0))
+    assert_allclose(lazy.ewma(x, 5.0).compute(), ewma_2d(A, 5.0))
+    assert_allclose(lazy.min_max(x).compute(), min_max(A))
+
+    rolling = lazy.windowed_pass(lazy.array(A[:, 1]) * 3, 10, value=mean) - 1
+    assert_allclose(rolling.compute(), windowed_pass(A[:, 1] * 3, 10, value=mean) - 1)
+
+
+def test_apply():
+    A = data()
+
+    result = lazy.apply(logistic, lazy.array(A) - 0.5)
+
+    assert_allclose(result.compute(), 1 / (1 + np.exp(-(A - 0.5))))
+
+
+def test_broadcasting_and_types():
+    rows = lazy.array(np.arange(6).reshape(2, 3))
+    cols = lazy.array(np.array([[10], [20]]))
+
+    total = (rows + cols).compute()
+    assert total.dtype == np.arange(1).dtype
+    assert total.tolist() == [[10, 11, 12], [23, 24, 25]]
+
+    assert (rows / 2).compute().dtype == np.float64
+    assert (lazy.array(np.ones(3, np.float32)) * 2.0).compute().dtype == np.float32
+
+
+def test_inputs_not_copied():
+    import tracemalloc
+
+    rows = np.random.RandomState(0).rand(1, 1000)
+    cols = np.random.RandomState(1).rand(1000, 1)
+    strided = np.random.RandomState(2).rand(1000, 2000)[:, ::2]
+    expr = lazy.array(rows) * lazy.array(cols) + lazy.array(strided)
+    expr.compute()
+
+    tracemalloc.start()
+    try:
+        result = expr.compute()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert_allclose(result, rows * cols + strided)
+    # Only the result is allocated, not broadcast or contiguous copies.
+    assert peak < 1.5 * result.nbytes
+
+
+def test_comparisons():
+    data = np.array([[0.0, 1.5, -2.0], [3.0, 0.0, 1.5]])
+    x = lazy.array(data)
+
+    for result, expected in [(x == 0, data == 0), (x != 1.5, data != 1.5), (x < 1, data < 1),
+                             (x <= 1.5, data <= 1.5), (x > 0, data > 0), (x >= 3, data >= 3),
+                             (0 < x, 0 < data), (data == x, data == data),
+                             ((x * 2 > 1) == (x > 0.5), np.ones_like(data, dtype=bool))]:
+        assert result.compute().dtype == np.bool_
+        assert (result.compute() == expected).all()
+
+    assert not x == 'a'
+    assert x != object()
+    with raises(TypeError):
+        x < 'a'
+    with raises(TypeError):
+        bool(x == 0)
+
+    assert len({x, lazy.array(data)}) == 2
+
+
+def test_constants_and_call_arguments():
+    x = lazy.array(np.arange(3.0))
+
+    assert_allclose(lazy.call(np.sqrt, 4.0).compute(), 2.0)
+    assert_allclose(lazy.call(np.add, x, np.ones(3)).compute(), [1.0, 2.0, 3.0])
+    assert_allclose(np.maximum(x * np.nan, -np.inf).compute(), [np.nan] * 3)
+    assert_allclose(np.minimum(x, np.inf).compute(), [0.0, 1.0, 2.0])
+
+
+def test_repr():
+    x = lazy.array(np.arange(3.0))
+
+    assert repr(x) == '<lazy array>'
+    assert repr(np.exp(x)) == '<lazy exp>'
+    assert repr(lazy.apply(logistic, x)) == '<lazy logistic>'
+    assert repr(lazy.demean(x)) == '<lazy demean>'
+
+
+def test_unsupported_values():
+    x = lazy.array(np.arange(3.0))
+
+    with raises(TypeError):
+        x + 'a'
+    with raises(TypeError):
+        lazy.compute([1, 2])
+    with raises(TypeError):
+        np.add.reduce(x)
+    with raises(TypeError):
+        np.frompyfunc(abs, 1, 1)(x)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,87 @@
+"""
+Guards the start-up cost of `import fastats`.
+
+numba (and scipy) take most of the time when
+importing fastats, so these check that they're
+only imported once a function needing them is
+first accessed. Each check runs in a fresh
+interpreter so that modules imported by other
+tests don't interfere.
+"""
+import os
+import subprocess
+import sys
+
+from pytest import mark, raises
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def imported_after(code):
+    script = code + '\nimport sys\nprint(" ".join(sorted(sys.modules)))'
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT)
+    return set(output.decode().split())
+
+
+@mark.parametrize('code', [
+    'import fastats',
+    'import fastats.maths',
+    'from fastats.linear_algebra import ols, ols_qr',
+])
+def test_heavy_modules_not_imported(code):
+    modules = imported_after(code)
+
+    assert 'fastats' in modules
+    assert 'numba' not in modules
+    assert 'scipy' not in modules
+
+
+def test_heavy_modules_imported_on_access():
+    modules = imported_after('import fastats; fastats.single_pass')
+
+    assert 'numba' in modules
+    assert 'fastats.core.single_pass' in modules
+
+
+def test_lazy_attributes():
+    import fastats
+    from fastats.core.single_pass import single_pass
+
+    assert fastats.single_pass is single_pass
+    assert 'single_pass' in dir(fastats)
+    assert set(fastats.__all__) <= set(dir(fastats))
+
+
+def test_submodules_do_not_hide_functions():
+    from fastats import linear_algebra
+    from fastats.linear_algebra.lu import lu
+    from fastats.linear_algebra.det import det
+
+    # Importing `inv` imports the `det` module as well,
+    # which must not replace the `det` function.
+    assert callable(linear_algebra.inv)
+    assert linear_algebra.det is det
+    assert linear_algebra.lu is lu
+
+
+def test_missing_attribute():
+    import fastats
+
+    with raises(AttributeError, match='not_a_function'):
+        fastats.not_a_function
+
+
+def test_ols_without_scipy_import():
+    import numpy as np
+    from fastats.linear_algebra import ols_qr, ols_cholesky, ols_svd
+
+    A = np.array([[1.0, 0.0], [1.0, 1.0], [1.0, 2.0]])
+    b = np.array([1.0, 3.0, 5.0])
+
+    for func in (ols_qr, ols_cholesky, ols_svd):
+        assert np.allclose(func(A, b), [1.0, 2.0])
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,200 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numba.core.registry import CPUDispatcher
+from numpy.testing import assert_allclose
+from pytest import fixture, raises
+
+from fastats import parallel, single_pass, windowed_pass, windowed_stateful_pass
+from fastats.maths import ewma
+from fastats.maths.correlation import pearson_pairwise
+from fastats.maths.ewma import ewma_2d
+from fastats.parallel import SharedArray
+from fastats.scaling import standard
+
+
+def mean(x):  # pragma: no cover
+    return np.sum(x) / x.size
+
+
+def double(x):  # pragma: no cover
+    return x * 2
+
+
+def rolling_sum(x, val_in, val_out, state):  # pragma: no cover
+    if state.size == 0:
+        state = np.array([np.sum(x)], dtype=x.dtype)
+    else:
+        state[0] += val_in - val_out
+    return state[0], state
+
+
+def total(x):  # pragma: no cover
+    return np.sum(x)
+
+
+def data():
+    return np.random.RandomState(0).rand(50, 9)
+
+
+def test_map_plain_function():
+    chunks = list(data().T)
+
+    results = parallel.map(ewma, chunks, 5.0, workers=3)
+
+    assert len(results) == len(chunks)
+    for chunk, result in zip(chunks, results):
+        assert_allclose(result, ewma(chunk, 5.0))
+
+
+def test_map_fs_function_with_overrides():
+    chunks = list(data().T)
+
+    results = parallel.map(windowed_pass, chunks, 4, value=mean, workers=2, chunksize=2)
+
+    for chunk, result in zip(chunks, results):
+        assert_allclose(result, windowed_pass(chunk, 4, value=mean))
+
+
+def test_map_empty():
+    assert parallel.map(ewma, [], 5.0) == []
+
+
+def test_compiled():
+    kernel, kwargs = parallel.compiled(windowed_pass, {'win': 3, 'value': mean})
+    assert isinstance(kernel, CPUDispatcher)
+    assert kwargs == {'win': 3}
+
+    assert parallel.compiled(kernel, {}) == (kernel, {})
+    assert isinstance(parallel.compiled(ewma, {})[0], CPUDispatcher)
+
+
+def test_map_columns():
+    A = data()
+
+    result = parallel.map_columns(windowed_stateful_pass, A, 5, value=rolling_sum, workers=2)
+
+    assert result.shape == A.shape
+    for j in range(A.shape[1]):
+        assert_allclose(result[:, j], windowed_stateful_pass(A[:, j], 5, value=rolling_sum))
+
+
+def test_map_columns_writes_out():
+    A = data()
+
+    result = parallel.map_columns(single_pass, A, value=double, workers=2)
+    assert result.flags.f_contiguous
+    assert_allclose(result, A * 2)
+
+    out = np.empty_like(A, dtype=np.float32)
+    assert parallel.map_columns(ewma, A, 3.0, out=out, workers=2) is out
+    for j in range(A.shape[1]):
+        assert_allclose(out[:, j], ewma(A[:, j], 3.0), rtol=1e-6)
+
+
+def test_map_columns_scalar_results():
+    A = data()
+
+    result = parallel.map_columns(total, A, workers=4, chunksize=1)
+
+    assert_allclose(result, A.sum(axis=0))
+
+
+def test_map_columns_requires_2d():
+    with raises(ValueError):
+        parallel.map_columns(total, np.arange(3.0))
+
+
+def test_map_columns_no_columns():
+    A = np.empty((5, 0))
+
+    assert parallel.map_columns(total, A).shape == (0,)
+
+    out = np.empty((5, 0))
+    assert parallel.map_columns(ewma, A, 3.0, out=out) is out
+
+
+@fixture(scope='module')
+def executor():
+    # numba's threading layer isn't fork-safe.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(2, mp_context=context) as pool:
+        yield pool
+
+
+def correlate(block, Z):  # pragma: no cover
+    return (Z.T @ block) / Z.shape[0]
+
+
+def scale(block, x, y):  # pragma: no cover
+    return block * (np.sum(x) / np.sum(y))
+
+
+def test_shared_array_pickled_by_name():
+    with SharedArray.copy(np.arange(6.0).reshape(2, 3)) as shared:
+        attached = pickle.loads(pickle.dumps(shared))
+        attached.array[0, 0] = 10.0
+
+        assert shared.array[0, 0] == 10.0
+        attached.close()
+
+
+def test_process_map_columns(executor):
+    A = data()
+
+    result = parallel.process_map(ewma_2d, A, 5.0, executor=executor, chunksize=2)
+
+    assert_allclose(result, ewma_2d(A, 5.0))
+
+
+def test_process_map_shared_arguments(executor):
+    A = data()
+    Z = standard(A)
+
+    result = parallel.process_map(correlate, Z, Z, executor=executor, chunksize=4)
+
+    assert_allclose(result, pearson_pairwise(A))
+
+
+def test_process_map_rows_into_shared_out(executor):
+    A = data()
+
+    with SharedArray(A.shape) as out:
+        result = parallel.process_map(
+            single_pass, A, value=double, axis=0, out=out, executor=executor, chunksize=20
+        )
+        assert result is out.array
+        assert_allclose(out.array, A * 2)
+        result = None
+
+
+def test_process_map_shared_input(executor):
+    A = data()
+    expected = A * (A[0].sum() / A[1].sum())
+
+    with SharedArray.copy(A) as shared:
+        out = np.empty_like(A)
+        result = parallel.process_map(scale, shared, A[0], A[1], out=out, executor=executor, chunksize=3)
+
+    assert result is out
+    assert_allclose(out, expected)
+
+
+def test_process_map_own_pool():
+    A = data()
+
+    result = parallel.process_map(ewma_2d, A, 5.0, workers=2)
+
+    assert_allclose(result, ewma_2d(A, 5.0))
+
+
+def test_process_map_requires_data(executor):
+    with raises(ValueError):
+        parallel.process_map(ewma_2d, np.empty((5, 0)), 5.0, executor=executor)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])